@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Backfill benchmark of push_to_elasticsearch.py against the stub Elasticsearch.
+
+Writes --reports synthetic InSpec reports, then backfills them with each
+--concurrency level into a fresh stub that answers 429 beyond
+--max-concurrent-bulk requests at once, checking that every control
+arrived. A last run resumes from a checkpoint left half way, checking that
+only the rest is pushed.
+
+Usage: python benchmarks/bench_backfill.py [--reports 40] [--controls 2000] [--concurrency 1 4 8]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'dashboard', 'scripts'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import push_to_elasticsearch as pusher
+import stub_es
+from synthetic_report import write_report
+
+
+def run_backfill(source, checkpoint, concurrency, args):
+    """Backfill into a fresh stub, returns (seconds, stub)"""
+    server = stub_es.start(max_concurrent_bulk=args.max_concurrent_bulk, latency=args.latency)
+    pusher.ES_HOST = server.url
+    output = io.StringIO()
+    options = {'max_docs': args.batch_docs, 'backoff': 0.02, 'partition': 'none'}
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        ok = pusher.backfill(source, options, checkpoint, args.workers, concurrency, progress_every=3600)
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    if not ok:
+        raise RuntimeError(f"backfill failed:\n{output.getvalue()}")
+    return elapsed, server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reports', type=int, default=40)
+    parser.add_argument('--controls', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--workers', type=int, default=2, help='Parsing processes')
+    parser.add_argument('--batch-docs', type=int, default=500)
+    parser.add_argument('--max-concurrent-bulk', type=int, default=4,
+                        help='Stub answers 429 beyond this many _bulk requests at once')
+    parser.add_argument('--latency', type=float, default=0.02, help='Stub latency per _bulk request')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'reports')
+        os.makedirs(source)
+        for r in range(args.reports):
+            write_report(os.path.join(source, f'scan-{r:04d}.json'), controls=args.controls,
+                         results_per_control=2, seed=r)
+        expected = args.reports * args.controls
+
+        print(f"{'concurrency':>11} {'seconds':>8} {'docs/s':>9} {'peak bulk':>9} {'429 req':>8}")
+        for concurrency in args.concurrency:
+            checkpoint = os.path.join(tmp, f'checkpoint-{concurrency}.jsonl')
+            elapsed, server = run_backfill(source, checkpoint, concurrency, args)
+            if len(server.documents) != expected:
+                sys.exit(f"expected {expected} documents, the stub holds {len(server.documents)}")
+            print(f"{concurrency:>11} {elapsed:>8.2f} {expected / elapsed:>9,.0f} "
+                  f"{server.peak_bulk:>9} {server.throttled_requests:>8}")
+
+            # A second run over the same checkpoint has nothing left to push
+            _, server = run_backfill(source, checkpoint, concurrency, args)
+            if server.documents:
+                sys.exit(f"resumed run re-pushed {len(server.documents)} documents")
+
+        # An interrupted run: only the first half of the reports made it into the checkpoint
+        checkpoint = pusher.BackfillCheckpoint(os.path.join(tmp, 'checkpoint-resume.jsonl'))
+        half = args.reports // 2
+        for name in sorted(os.listdir(source))[:half]:
+            path = os.path.join(source, name)
+            checkpoint.mark_done(path, pusher.file_signature(path))
+        checkpoint.close()
+        _, server = run_backfill(source, checkpoint.path, max(args.concurrency), args)
+        if len(server.documents) != (args.reports - half) * args.controls:
+            sys.exit(f"resume pushed {len(server.documents)} documents, "
+                     f"expected {(args.reports - half) * args.controls}")
+        print(f"Resume: {half} of {args.reports} reports checkpointed, the other "
+              f"{args.reports - half} pushed ({len(server.documents)} documents)")
+
+
+if __name__ == '__main__':
+    main()
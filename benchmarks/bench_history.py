@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Insert and query benchmark of the SQLite compliance history store.
+
+Records --scans synthetic scans of --controls controls each (1M outcome rows
+by default), then times the trend, first-failure and MTTR queries.
+
+Usage: python benchmarks/bench_history.py [--scans 100] [--controls 10000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+from compliance_lib.controls import ControlBatch, ControlRecord, classify_severity, control_section
+from compliance_lib.history import HistoryStore
+
+
+def make_batch(rng, controls, failing):
+    """One scan: each control flips between passed and failed with a small probability"""
+    batch = ControlBatch('synthetic-profile')
+    for c in range(controls):
+        if rng.random() < 0.02:
+            failing[c] = not failing[c]
+        control_id = f"cis-aws-{c % 5 + 1}.{c}"
+        impact = (c % 10) / 10
+        batch.append(ControlRecord(control_id, f"Synthetic control {c}", impact,
+                                   1 if failing[c] else 0, classify_severity(impact),
+                                   control_section(control_id)))
+    return batch
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<28} {time.perf_counter() - start:>8.3f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scans', type=int, default=100)
+    parser.add_argument('--controls', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failing = [rng.random() < 0.1 for _ in range(args.controls)]
+    start_ts = int(time.time()) - args.scans * 86400
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        with HistoryStore(path) as store:
+            begin = time.perf_counter()
+            for scan in range(args.scans):
+                store.record_scan([make_batch(rng, args.controls, failing)], start_ts + scan * 86400)
+            elapsed = time.perf_counter() - begin
+            rows = args.scans * args.controls
+            print(f"Recorded {rows} outcomes in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s), "
+                  f"{os.path.getsize(path) / 1024 / 1024:.1f} MB")
+
+        with HistoryStore(path, readonly=True) as store:
+            timed('trend (all scans)', lambda: store.score_trend())
+            timed('trend (section 2, 30 days)', lambda: store.score_trend(days=30, section='2'))
+            timed('first-failure', lambda: store.first_failure('cis-aws-3.42'))
+            timed('latest scans', lambda: store.latest_scans())
+            scan = store.latest_scans()[0][0]
+            batch = timed('load latest batch', lambda: store.load_batch(scan, 'production', 'synthetic-profile'))
+            assert len(batch) == args.controls
+            result = timed('mttr (all)', lambda: store.mttr())
+            timed('mttr (30 days)', lambda: store.mttr(days=30))
+            print(f"MTTR {result['mttr_seconds'] / 86400:.1f} days over {result['remediations']} remediations")
+
+
+if __name__ == '__main__':
+    main()
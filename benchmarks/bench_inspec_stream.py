@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: json.load vs the streaming InSpec reader.
+
+Generates a synthetic report (1M results by default) and parses it in a fresh
+child process per mode so peak RSS is measured in isolation.
+
+Usage: python benchmarks/bench_inspec_stream.py [--controls N] [--results-per-control N]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from compliance_lib import InSpecStreamReader
+from synthetic_report import write_report
+
+
+def parse(mode, path):
+    """Parse path with the given mode, returns the number of controls seen"""
+    if mode == 'json.load':
+        with open(path) as f:
+            data = json.load(f)
+        return sum(len(p.get('controls', [])) for p in data.get('profiles', []))
+    
+    count = 0
+    with InSpecStreamReader(path) as reader:
+        for _ in reader.controls():
+            count += 1
+    return count
+
+
+def run_child(mode, path):
+    start = time.perf_counter()
+    controls = parse(mode, path)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is KiB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({'mode': mode, 'controls': controls, 'seconds': elapsed, 'peak_rss_mb': peak_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--controls', type=int, default=1000)
+    parser.add_argument('--results-per-control', type=int, default=1000)
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        run_child(*args.child)
+        return
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'synthetic_inspec_report.json')
+        total = write_report(path, controls=args.controls, results_per_control=args.results_per_control)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"Synthetic report: {total} results, {size_mb:.1f} MB")
+        print(f"{'mode':<12} {'seconds':>8} {'peak RSS (MB)':>14}")
+        
+        for mode in ('json.load', 'stream'):
+            out = subprocess.run([sys.executable, __file__, '--child', mode, path],
+                                 check=True, capture_output=True, text=True).stdout
+            row = json.loads(out)
+            print(f"{row['mode']:<12} {row['seconds']:>8.2f} {row['peak_rss_mb']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Time and memory benchmark of the compliance report generator.
+
+For each size a synthetic report is scored and rendered in a fresh child
+process, once building the markdown as a string and once writing it straight
+to the output file, so peak memory is measured in isolation.
+
+Usage: python benchmarks/bench_report_generator.py [--sizes 1000 10000 100000] [--tracemalloc]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from generate_compliance_report import ComplianceReportGenerator, WRITE_BUFFER_SIZE
+from synthetic_report import write_report
+
+
+def render(mode, path, output):
+    generator = ComplianceReportGenerator(path)
+    with generator.load_inspec_results() as results:
+        compliance_data = generator.calculate_compliance_score(results)
+
+    if mode == 'string':
+        report = generator.generate_markdown_report(compliance_data)
+        with open(output, 'w') as f:
+            f.write(report)
+    else:
+        with open(output, 'w', buffering=WRITE_BUFFER_SIZE) as f:
+            generator.write_markdown_report(compliance_data, f)
+    generator.generate_json_summary(compliance_data)
+    return compliance_data['total_controls']
+
+
+def run_child(mode, path, output, trace):
+    # tracemalloc slows parsing down a lot, so timings are only meaningful without it
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    controls = render(mode, path, output)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if trace else 0
+    # ru_maxrss is KiB on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({'mode': mode, 'controls': controls, 'seconds': elapsed,
+                      'peak_alloc_mb': peak / 1024 / 1024, 'peak_rss_mb': peak_rss_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Numbers of controls to benchmark')
+    parser.add_argument('--results-per-control', type=int, default=10)
+    parser.add_argument('--failure-rate', type=float, default=0.1)
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='Also report peak Python allocations (much slower)')
+    parser.add_argument('--child', nargs=3, metavar=('MODE', 'PATH', 'OUTPUT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child, args.tracemalloc)
+        return
+
+    print(f"{'controls':>9} {'mode':<8} {'seconds':>8} {'peak alloc (MB)':>16} {'peak RSS (MB)':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f'synthetic_{size}.json')
+            output = os.path.join(tmp, 'compliance_report.md')
+            write_report(path, controls=size, results_per_control=args.results_per_control,
+                         failure_rate=args.failure_rate)
+            for mode in ('string', 'stream'):
+                cmd = [sys.executable, __file__, '--child', mode, path, output]
+                if args.tracemalloc:
+                    cmd.append('--tracemalloc')
+                out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+                row = json.loads(out)
+                alloc = f"{row['peak_alloc_mb']:.1f}" if args.tracemalloc else '-'
+                print(f"{row['controls']:>9} {row['mode']:<8} {row['seconds']:>8.2f} "
+                      f"{alloc:>16} {row['peak_rss_mb']:>14.1f}")
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Pure-Python vs NumPy scoring engine benchmark.
+
+Times build_batch + tally for each engine on large randomly generated control
+sets (including boundary impacts, missing impacts and inconsistent result
+counts). That both engines give identical results is checked by
+tests/test_scoring.py on the same control sets.
+
+Usage: python benchmarks/bench_scoring.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+from compliance_lib import scoring
+from compliance_lib.scoring import build_batch, tally
+
+BOUNDARY_IMPACTS = [0.0, 0.39999, 0.4, 0.69999, 0.7, 0.89999, 0.9, 1.0, 1, 0, -0.5, 2.0, float('nan')]
+
+
+def random_controls(rng, size):
+    """Streamed-control dicts as produced by InSpecStreamReader(keep_failures=False)"""
+    controls = []
+    for c in range(size):
+        results = rng.choice([0, 0, 1, 3, 10, rng.randint(0, 200)])
+        passed = rng.randint(0, results)
+        failed = rng.randint(0, results - passed)
+        if rng.random() < 0.5:
+            passed, failed = results, 0  # fully passing is the common case
+        control = {
+            'id': rng.choice([f'cis-aws-{rng.randint(1, 6)}.{c}', f'cis-linux-5.2.{c}', f'custom{c}', f'a-b-.{c}']),
+            'result_count': results,
+            'passed_count': passed,
+            'failed_count': failed
+        }
+        roll = rng.random()
+        if roll < 0.2:
+            control['impact'] = rng.choice(BOUNDARY_IMPACTS)
+        elif roll < 0.9:
+            control['impact'] = round(rng.random(), rng.randint(1, 3))
+        if rng.random() < 0.9:
+            control['title'] = f'Control {c}'
+        controls.append(control)
+    return controls
+
+
+def bench(size, repeat):
+    controls = random_controls(random.Random(size), size)
+    timings = {}
+    for engine in ('python', 'numpy'):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            tally(build_batch('p', controls, engine), engine)
+            best = min(best, time.perf_counter() - start)
+        timings[engine] = best
+    print(f"{size:>9} {timings['python']:>10.3f} {timings['numpy']:>10.3f} "
+          f"{timings['python'] / timings['numpy']:>8.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if scoring.np is None:
+        sys.exit("numpy is not installed; only the pure-Python engine is available")
+
+    print(f"{'controls':>9} {'python (s)':>10} {'numpy (s)':>10} {'speedup':>9}")
+    for size in args.sizes:
+        bench(size, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
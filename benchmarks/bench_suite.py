@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite of the Python compliance tooling, stage by stage.
+
+For each scenario a seeded synthetic InSpec report is generated and every
+pipeline stage is timed on it, then run once more under tracemalloc for its
+peak allocations:
+
+  parse      stream the report (InSpecStreamReader, failed results kept)
+  classify   build ControlBatches from the parsed controls
+  aggregate  tally and merge the batches
+  render     write the markdown report (ComplianceReportGenerator)
+  metrics    exporter extract_metrics, end to end (needs prometheus_client)
+  push       push_controls to a local stub Elasticsearch, end to end
+
+Results are written as JSON (--output) and can be compared with an earlier
+run (--compare): a stage whose best time or peak memory grew by more than the
+threshold is a regression and the exit status is 1.
+
+Usage: python benchmarks/bench_suite.py [--scenario small medium] [--output new.json]
+                                        [--compare old.json] [--threshold 0.1]
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(ROOT)
+sys.path.insert(0, os.path.join(REPO, 'scripts'))
+sys.path.insert(0, ROOT)
+
+from compliance_lib import InSpecStreamReader, scoring
+from compliance_lib.scoring import build_batch, merge, tally
+from generate_compliance_report import ComplianceReportGenerator, WRITE_BUFFER_SIZE
+from synthetic_report import write_report
+
+FORMAT_VERSION = 1
+
+# name -> (profiles, controls per profile, results per control, failure rate)
+SCENARIOS = {
+    'small': (1, 1000, 10, 0.1),
+    'medium': (2, 10000, 10, 0.1),
+    'large': (4, 50000, 10, 0.2),
+    'wide': (1, 2000, 200, 0.3),
+}
+STAGES = ('parse', 'classify', 'aggregate', 'render', 'metrics', 'push')
+
+# Timings and peaks below these are too noisy to flag as regressions
+MIN_SECONDS = 0.005
+MIN_PEAK_BYTES = 1 << 16
+
+
+class Context:
+    """Fixture of one scenario plus the inputs each stage starts from"""
+
+    def __init__(self, path, controls):
+        self.path = path
+        self.controls = controls
+        self.profiles = None
+        self.batches = None
+        self.compliance_data = None
+        self.es_url = None
+
+
+# -- stages ---------------------------------------------------------------
+# Each returns the number of controls it processed
+
+def parse(ctx):
+    count = 0
+    with InSpecStreamReader(ctx.path) as reader:
+        for _, controls in reader.profiles():
+            for _ in controls:
+                count += 1
+    return count
+
+
+def classify(ctx):
+    return sum(len(build_batch(name, controls)) for name, controls in ctx.profiles)
+
+
+def aggregate(ctx):
+    return merge(tally(batch) for batch in ctx.batches).total
+
+
+def render(ctx):
+    generator = ComplianceReportGenerator(ctx.path)
+    with open(os.devnull, 'w', buffering=WRITE_BUFFER_SIZE) as out:
+        generator.write_markdown_report(ctx.compliance_data, out)
+    return ctx.compliance_data['total_controls']
+
+
+def metrics(ctx):
+    import compliance_exporter
+    reader = compliance_exporter.load_inspec_results(ctx.path)
+    if not compliance_exporter.extract_metrics(reader, 'benchmark'):
+        raise RuntimeError(f"extract_metrics failed on {ctx.path}")
+    return ctx.controls
+
+
+def push(ctx):
+    import push_to_elasticsearch as pusher
+    pusher.ES_HOST = ctx.es_url
+    indexer = pusher.BulkIndexer(backoff=0.01)
+    with InSpecStreamReader(ctx.path, keep_failures=False) as reader:
+        pusher.push_controls(reader, indexer, 'benchmark', '2024-12-08T01:30:00')
+    if not indexer.close():
+        raise RuntimeError('stub Elasticsearch rejected documents')
+    return indexer.indexed
+
+
+def prepare(stage, ctx):
+    """Build a stage's input outside of the measured section"""
+    if stage in ('classify', 'aggregate') and ctx.profiles is None:
+        with InSpecStreamReader(ctx.path) as reader:
+            ctx.profiles = [(profile.get('name', 'Unknown'), list(controls))
+                            for profile, controls in reader.profiles()]
+    if stage == 'aggregate' and ctx.batches is None:
+        ctx.batches = [build_batch(name, controls) for name, controls in ctx.profiles]
+    if stage == 'render' and ctx.compliance_data is None:
+        generator = ComplianceReportGenerator(ctx.path)
+        with generator.load_inspec_results() as results:
+            ctx.compliance_data = generator.calculate_compliance_score(results)
+
+
+def available(stage):
+    """Reason a stage cannot run here, or None"""
+    if stage == 'metrics':
+        try:
+            sys.path.insert(0, os.path.join(REPO, 'monitoring', 'exporters'))
+            import compliance_exporter  # noqa: F401
+        except ImportError as e:
+            return str(e)
+    if stage == 'push':
+        try:
+            sys.path.insert(0, os.path.join(REPO, 'dashboard', 'scripts'))
+            import push_to_elasticsearch  # noqa: F401
+        except ImportError as e:
+            return str(e)
+    return None
+
+
+# -- harness --------------------------------------------------------------
+
+def measure(func, ctx, repeat):
+    """Best and median wall time over repeat runs, then one traced run for peak memory"""
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            controls = func(ctx)
+            timings.append(time.perf_counter() - start)
+
+        gc.collect()
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        func(ctx)
+        peak = tracemalloc.get_traced_memory()[1] - base
+        tracemalloc.stop()
+
+    return {
+        'seconds': min(timings),
+        'median_seconds': statistics.median(timings),
+        'peak_bytes': peak,
+        'controls': controls,
+        'controls_per_second': controls / min(timings) if min(timings) else None
+    }
+
+
+@contextlib.contextmanager
+def stub_es():
+    """Stub Elasticsearch in a child process, so its document store stays out of the measurements"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    proc = subprocess.Popen([sys.executable, '-u', os.path.join(ROOT, 'stub_es.py'), '--port', str(port)],
+                            stdout=subprocess.PIPE, text=True)
+    try:
+        proc.stdout.readline()  # "listening on ..."
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def run_scenario(name, params, stages, repeat, seed, workdir, es_url):
+    profiles, controls, results_per_control, failure_rate = params
+    path = os.path.join(workdir, f'{name}_{profiles}x{controls}x{results_per_control}_'
+                                 f'{failure_rate}_{seed}.json')
+    if not os.path.exists(path):
+        write_report(path, profiles, controls, results_per_control, failure_rate, seed)
+    ctx = Context(path, profiles * controls)
+    ctx.es_url = es_url
+
+    rows = {}
+    for stage in stages:
+        prepare(stage, ctx)
+        row = measure(globals()[stage], ctx, repeat)
+        rows[f'{name}/{stage}'] = row
+        print(f"{name:<10} {stage:<10} {row['seconds']:>9.3f} {row['median_seconds']:>9.3f} "
+              f"{row['peak_bytes'] / 1024 / 1024:>10.1f} {row['controls_per_second'] or 0:>13,.0f}")
+    return {'params': {'profiles': profiles, 'controls': controls,
+                       'results_per_control': results_per_control, 'failure_rate': failure_rate,
+                       'seed': seed, 'report_bytes': os.path.getsize(path)},
+            'results': rows}
+
+
+def compare(old, new, threshold, memory_threshold):
+    """Print the change of every stage present in both runs, returns the regressions"""
+    regressions = []
+    print(f"\n{'stage':<21} {'old (s)':>9} {'new (s)':>9} {'change':>8} {'old MB':>8} {'new MB':>8} {'change':>8}")
+    for key, row in new['results'].items():
+        before = old['results'].get(key)
+        scenario = key.split('/')[0]
+        if before is None or old['scenarios'].get(scenario) != new['scenarios'].get(scenario):
+            continue
+        time_change = row['seconds'] / before['seconds'] - 1 if before['seconds'] else 0.0
+        memory_change = row['peak_bytes'] / before['peak_bytes'] - 1 if before['peak_bytes'] else 0.0
+        flags = []
+        if time_change > threshold and max(row['seconds'], before['seconds']) >= MIN_SECONDS:
+            flags.append('time')
+        if memory_change > memory_threshold and max(row['peak_bytes'], before['peak_bytes']) >= MIN_PEAK_BYTES:
+            flags.append('memory')
+        print(f"{key:<21} {before['seconds']:>9.3f} {row['seconds']:>9.3f} {time_change:>+8.1%} "
+              f"{before['peak_bytes'] / 1024 / 1024:>8.1f} {row['peak_bytes'] / 1024 / 1024:>8.1f} "
+              f"{memory_change:>+8.1%}{'  REGRESSION (' + ', '.join(flags) + ')' if flags else ''}")
+        if flags:
+            regressions.append((key, flags))
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenario', nargs='+', default=['small', 'medium'],
+                        help=f"Scenarios to run: {', '.join(SCENARIOS)}, or 'custom' (see below)")
+    parser.add_argument('--stage', nargs='+', default=list(STAGES), choices=STAGES)
+    parser.add_argument('--profiles', type=int, default=1, help="'custom' scenario: profiles")
+    parser.add_argument('--controls', type=int, default=5000, help="'custom' scenario: controls per profile")
+    parser.add_argument('--results-per-control', type=int, default=10, help="'custom' scenario")
+    parser.add_argument('--failure-rate', type=float, default=0.1, help="'custom' scenario")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per stage (the best counts)')
+    parser.add_argument('--workdir', help='Keep generated reports here for reuse (default: a temporary directory)')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--compare', metavar='BASELINE', help='Results JSON of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Allowed slowdown of a stage before it is a regression (default: 0.10)')
+    parser.add_argument('--memory-threshold', type=float, default=0.10,
+                        help='Allowed growth of a stage\'s peak memory (default: 0.10)')
+    args = parser.parse_args()
+
+    scenarios = dict(SCENARIOS, custom=(args.profiles, args.controls, args.results_per_control,
+                                        args.failure_rate))
+    unknown = [name for name in args.scenario if name not in scenarios]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    stages = []
+    for stage in args.stage:
+        reason = available(stage)
+        if reason:
+            print(f"Skipping {stage}: {reason}")
+        else:
+            stages.append(stage)
+
+    run = {
+        'format': FORMAT_VERSION,
+        'commit': git_commit(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scoring_engine': scoring.DEFAULT_ENGINE,
+        'numpy': scoring.np is not None,
+        'repeat': args.repeat,
+        'scenarios': {},
+        'results': {}
+    }
+
+    print(f"{'scenario':<10} {'stage':<10} {'best (s)':>9} {'median':>9} {'peak (MB)':>10} {'controls/s':>13}")
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(workdir, exist_ok=True)
+        es_url = stack.enter_context(stub_es()) if 'push' in stages else None
+        for name in args.scenario:
+            result = run_scenario(name, scenarios[name], stages, args.repeat, args.seed, workdir, es_url)
+            run['scenarios'][name] = result['params']
+            run['results'].update(result['results'])
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('format') != FORMAT_VERSION:
+            sys.exit(f"{args.compare} has result format {baseline.get('format')}, expected {FORMAT_VERSION}")
+        regressions = compare(baseline, run, args.threshold, args.memory_threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare} "
+                  f"({(baseline.get('commit') or 'unknown')[:12]})")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Minimal Elasticsearch stand-in for exercising push_to_elasticsearch.py.
+
+Accepts index/template/alias management calls and ``_bulk`` requests, keeps
+the indexed documents in memory, and can reject a fraction of bulk items
+with 429 to exercise retry/backpressure paths. With --max-concurrent-bulk it
+also answers 429 to whole _bulk requests beyond that many at once (like a
+full write thread pool queue), and --latency slows every _bulk request down.
+
+Usage: python benchmarks/stub_es.py [--port 9200] [--reject-rate 0.1]
+                                    [--max-concurrent-bulk 4] [--latency 0.05]
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubElasticsearch(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, reject_rate=0.0, seed=0, max_concurrent_bulk=0, latency=0.0):
+        super().__init__(address, _Handler)
+        self.reject_rate = reject_rate
+        self.max_concurrent_bulk = max_concurrent_bulk
+        self.latency = latency
+        self.active_bulk = 0
+        self.peak_bulk = 0
+        self.throttled_requests = 0
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.documents = {}
+        self.indices = set()
+        self.resources = set()
+        self.bulk_requests = 0
+        self.rejected = 0
+        self.requests = []
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length) if length else b''
+
+    def do_GET(self):
+        self.server.requests.append(('GET', self.path))
+        path = self.path.split('?')[0]
+        if path.startswith('/_cat/indices/'):
+            prefix = path[len('/_cat/indices/'):].rstrip('*')
+            self._reply(200, [{'index': name} for name in sorted(self.server.indices)
+                              if name.startswith(prefix)])
+        elif path.startswith('/_alias/'):
+            self._reply(404, {'error': 'alias missing', 'status': 404})
+        else:
+            self._reply(200, {'tagline': 'You Know, for Search (stub)'})
+
+    def do_HEAD(self):
+        self.server.requests.append(('HEAD', self.path))
+        known = self.path in self.server.resources or self.path.strip('/') in self.server.indices
+        self.send_response(200 if known else 404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_PUT(self):
+        self._body()
+        self.server.requests.append(('PUT', self.path))
+        self.server.resources.add(self.path)
+        if not self.path.startswith('/_'):
+            self.server.indices.add(self.path.strip('/'))
+        self._reply(200, {'acknowledged': True})
+
+    def do_DELETE(self):
+        self.server.requests.append(('DELETE', self.path))
+        name = self.path.strip('/')
+        with self.server.lock:
+            self.server.indices.discard(name)
+            for key in [k for k in self.server.documents if k[0] == name]:
+                del self.server.documents[key]
+        self._reply(200, {'acknowledged': True})
+
+    def do_POST(self):
+        body = self._body()
+        self.server.requests.append(('POST', self.path))
+        if not self.path.split('?')[0].endswith('/_bulk'):
+            self._reply(200, {'acknowledged': True})
+            return
+
+        server = self.server
+        with server.lock:
+            if server.max_concurrent_bulk and server.active_bulk >= server.max_concurrent_bulk:
+                server.throttled_requests += 1
+                busy = True
+            else:
+                server.active_bulk += 1
+                server.peak_bulk = max(server.peak_bulk, server.active_bulk)
+                busy = False
+        if busy:
+            self._reply(429, {'error': {'type': 'es_rejected_execution_exception'}, 'status': 429})
+            return
+        try:
+            if server.latency:
+                time.sleep(server.latency)
+            self._bulk(body)
+        finally:
+            with server.lock:
+                server.active_bulk -= 1
+
+    def _bulk(self, body):
+        lines = body.splitlines()
+        items = []
+        errors = False
+        server = self.server
+        with server.lock:
+            server.bulk_requests += 1
+            for action_line, source_line in zip(lines[::2], lines[1::2]):
+                action, meta = next(iter(json.loads(action_line).items()))
+                if server.rng.random() < server.reject_rate:
+                    server.rejected += 1
+                    errors = True
+                    items.append({action: {'status': 429, 'error': {'type': 'es_rejected_execution_exception'}}})
+                    continue
+                doc_id = meta.get('_id') or f"auto-{len(server.documents)}"
+                server.indices.add(meta.get('_index'))
+                key = (meta.get('_index'), doc_id)
+                created = key not in server.documents
+                server.documents[key] = json.loads(source_line)
+                items.append({action: {'_index': meta.get('_index'), '_id': doc_id,
+                                       'status': 201 if created else 200}})
+        self._reply(200, {'took': 1, 'errors': errors, 'items': items})
+
+
+def start(port=0, reject_rate=0.0, seed=0, max_concurrent_bulk=0, latency=0.0):
+    """Start a stub server on a background thread, returns the server"""
+    server = StubElasticsearch(('127.0.0.1', port), reject_rate, seed, max_concurrent_bulk, latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub Elasticsearch server')
+    parser.add_argument('--port', type=int, default=9200)
+    parser.add_argument('--reject-rate', type=float, default=0.0,
+                        help='Fraction of bulk items rejected with 429')
+    parser.add_argument('--max-concurrent-bulk', type=int, default=0,
+                        help='Answer 429 to _bulk requests beyond this many at once (0 = no limit)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every _bulk request')
+    args = parser.parse_args()
+
+    server = StubElasticsearch(('127.0.0.1', args.port), args.reject_rate,
+                               max_concurrent_bulk=args.max_concurrent_bulk, latency=args.latency)
+    print(f"Stub Elasticsearch listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
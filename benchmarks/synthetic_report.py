@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Synthetic InSpec report generator for benchmarks.
+
+Writes the report incrementally so multi-hundred-MB fixtures can be produced
+without holding them in memory. Output is fully determined by the seed.
+"""
+
+import argparse
+import json
+import random
+
+
+def write_report(path, profiles=1, controls=1000, results_per_control=10,
+                 failure_rate=0.1, seed=42):
+    """Write a synthetic InSpec JSON report to path, returns total result count"""
+    rng = random.Random(seed)
+    total_results = 0
+    
+    with open(path, 'w') as f:
+        f.write('{"platform": {"name": "aws", "release": "aws-api"}, "profiles": [')
+        for p in range(profiles):
+            if p:
+                f.write(',')
+            f.write(json.dumps({'name': f'synthetic-profile-{p}', 'version': '1.0.0'})[:-1])
+            f.write(', "controls": [')
+            for c in range(controls):
+                if c:
+                    f.write(',')
+                section = c % 5 + 1
+                control = {
+                    'id': f'cis-aws-{section}.{c}',
+                    'title': f'Synthetic control {c} for section {section}',
+                    'desc': 'Generated for benchmarking',
+                    'impact': rng.choice((0.1, 0.3, 0.5, 0.7, 1.0)),
+                    'tags': {'cis_control': f'{section}.{c}'},
+                }
+                f.write(json.dumps(control)[:-1])
+                f.write(', "results": [')
+                failing = rng.random() < failure_rate
+                for r in range(results_per_control):
+                    if r:
+                        f.write(',')
+                    status = 'failed' if failing and rng.random() < 0.5 else 'passed'
+                    f.write(json.dumps({
+                        'status': status,
+                        'code_desc': f'Resource arn:aws:synthetic:{c}:{r} should be compliant',
+                        'run_time': round(rng.random(), 6),
+                        'start_time': '2024-12-08T01:30:00+07:00',
+                        'message': f'Resource {r} is not compliant' if status == 'failed' else '',
+                    }))
+                    total_results += 1
+                f.write(']}')
+            f.write(']}')
+        f.write('], "statistics": {"duration": 12.5}, "version": "5.22.3"}')
+    
+    return total_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic InSpec JSON report')
+    parser.add_argument('output', help='Path of the report to write')
+    parser.add_argument('--profiles', type=int, default=1)
+    parser.add_argument('--controls', type=int, default=1000)
+    parser.add_argument('--results-per-control', type=int, default=10)
+    parser.add_argument('--failure-rate', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    total = write_report(args.output, args.profiles, args.controls,
+                         args.results_per_control, args.failure_rate, args.seed)
+    print(f"Wrote {total} results to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
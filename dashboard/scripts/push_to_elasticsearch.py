@@ -1,20 +1,376 @@
 #!/usr/bin/env python3
 """
 Push compliance data to Elasticsearch for Kibana visualization.
+
+A single report or summary is pushed as a delta against the state file;
+--backfill pushes a whole directory (or glob) of them, parsed in parallel
+and shipped through concurrent _bulk requests, resumable from a checkpoint.
 """
 
+import argparse
+import contextlib
+import hashlib
 import json
+import random
 import requests
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
+from datetime import datetime, timedelta
 import sys
 import os
 
+# Shared parsing helpers live in the repository's scripts/compliance_lib
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "scripts"))
+
+from compliance_lib import open_report
+from compliance_lib.controls import ControlRecord
+from compliance_lib.fleet import iter_report_paths
+
 ES_HOST = os.getenv("ES_HOST", "http://localhost:9200")
+# Read alias; documents go to time partitions named INDEX_NAME-YYYY.MM[.DD]
 INDEX_NAME = "cis-compliance"
+INDEX_PARTITION = os.getenv("ES_INDEX_PARTITION", "monthly")
+PARTITION_FORMATS = {"daily": "%Y.%m.%d", "monthly": "%Y.%m"}
 
-def create_index():
-    """Create Elasticsearch index with proper mapping."""
-    mapping = {
+# Index template settings for the partitions
+INDEX_SHARDS = int(os.getenv("ES_INDEX_SHARDS", 1))
+INDEX_REPLICAS = int(os.getenv("ES_INDEX_REPLICAS", 1))
+INDEX_REFRESH_INTERVAL = os.getenv("ES_INDEX_REFRESH_INTERVAL", "30s")
+
+# Bulk batching limits (a batch is flushed when either is reached)
+BULK_MAX_DOCS = int(os.getenv("ES_BULK_MAX_DOCS", 1000))
+BULK_MAX_BYTES = int(os.getenv("ES_BULK_MAX_BYTES", 5 * 1024 * 1024))
+BULK_MAX_RETRIES = int(os.getenv("ES_BULK_MAX_RETRIES", 5))
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Seconds to wait for ES to answer any request (a hung node must not block the pusher)
+REQUEST_TIMEOUT = float(os.getenv("ES_REQUEST_TIMEOUT", 60))
+
+# Record of already-indexed controls, used to push only deltas
+STATE_FILE = os.getenv("ES_PUSH_STATE", ".es_push_state.json")
+STATE_MAX_REPORTS = 1000
+
+# Backfill: _bulk requests in flight and reports fully indexed so far
+BULK_CONCURRENCY = int(os.getenv("ES_BULK_CONCURRENCY", 4))
+BACKFILL_CHECKPOINT = os.getenv("ES_BACKFILL_CHECKPOINT", ".es_backfill_checkpoint.jsonl")
+
+_session = None
+
+def new_session(pool_maxsize=4):
+    """Keep-alive session (connection pool) for ES requests."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Content-Type"] = "application/json"
+    return session
+
+def get_session():
+    """Return the shared keep-alive session (connection pool) for ES requests."""
+    global _session
+    if _session is None:
+        _session = new_session()
+    return _session
+
+class BulkIndexer:
+    """Buffer documents and ship them through the _bulk endpoint.
+    
+    Items rejected with 429/5xx are retried with exponential backoff; other
+    item errors are counted as failures. on_indexed(ack) is called for every
+    document that was stored and on_failed(ack) for every document given up
+    on, with the ack passed to add().
+    """
+    
+    def __init__(self, index=INDEX_NAME, max_docs=BULK_MAX_DOCS, max_bytes=BULK_MAX_BYTES,
+                 max_retries=BULK_MAX_RETRIES, backoff=0.5, session=None, on_indexed=None,
+                 partition="none", on_failed=None):
+        self.index = index
+        self.partition = partition
+        self.on_indexed = on_indexed
+        self.on_failed = on_failed
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.session = session or get_session()
+        self._buffer = []
+        self._buffer_bytes = 0
+        self.indexed = 0
+        self.failed = 0
+        self.retried = 0
+        self.throttled = 0
+        self.batches = 0
+        self.bytes_sent = 0
+        self.started = time.monotonic()
+        # Guards the counters when batches are sent from several threads
+        self._lock = contextlib.nullcontext()
+    
+    def add(self, doc, doc_id=None, ack=None):
+        """Queue a document, flushing when the batch is full."""
+        self.add_item(bulk_item(self.index, self.partition, doc, doc_id), ack)
+    
+    def add_item(self, item, ack=None):
+        """Queue an encoded action/source pair (see bulk_item)."""
+        if self._buffer and (len(self._buffer) >= self.max_docs or
+                             self._buffer_bytes + len(item) > self.max_bytes):
+            self.flush()
+        self._buffer.append((item, ack))
+        self._buffer_bytes += len(item)
+    
+    def flush(self):
+        """Send the buffered batch."""
+        if not self._buffer:
+            return
+        items, self._buffer, self._buffer_bytes = self._buffer, [], 0
+        self.batches += 1
+        self._ship(items)
+    
+    def _ship(self, items):
+        """Send one batch, retrying what ES pushed back on.
+        
+        If sending fails unexpectedly, only the documents not acknowledged yet
+        are given up on.
+        """
+        try:
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    with self._lock:
+                        self.retried += len(items)
+                    time.sleep(self.backoff * (2 ** (attempt - 1)) * (1 + random.random()))
+                items = self._send(items)
+                if not items:
+                    return
+        except Exception as e:
+            print(f"Bulk batch failed: {e}")
+            self._give_up(items)
+            return
+        
+        print(f"Giving up on {len(items)} documents after {self.max_retries} retries")
+        self._give_up(items)
+    
+    def _send(self, items):
+        """POST one bulk request, returns the items that should be retried."""
+        body = b"".join(item for item, _ in items)
+        try:
+            response = self.session.post(f"{ES_HOST}/_bulk", data=body, timeout=REQUEST_TIMEOUT,
+                                         headers={"Content-Type": "application/x-ndjson"})
+        except (requests.ConnectionError, requests.Timeout) as e:
+            print(f"Bulk request failed: {e}")
+            return items
+        with self._lock:
+            self.bytes_sent += len(body)
+        
+        if response.status_code in RETRYABLE_STATUS:
+            if response.status_code == 429:
+                self._throttle()
+            return items
+        if not response.ok:
+            print(f"Bulk request rejected: {response.status_code} {response.text[:200]}")
+            self._give_up(items)
+            return []
+        
+        # Parsed in full before anything is acknowledged
+        outcomes = [next(iter(outcome.values())) for outcome in response.json().get("items", [])]
+        # Items the response does not account for were not confirmed: send them again
+        retry = list(items[len(outcomes):])
+        if retry:
+            print(f"Bulk response covered {len(outcomes)} of {len(items)} documents, retrying the rest")
+        throttled = False
+        with self._lock:
+            for item, outcome in zip(items, outcomes):
+                status = outcome.get("status", 500)
+                if status < 300:
+                    self.indexed += 1
+                    if self.on_indexed and item[1] is not None:
+                        self.on_indexed(item[1])
+                elif status in RETRYABLE_STATUS:
+                    retry.append(item)
+                    throttled = throttled or status == 429
+                else:
+                    self.failed += 1
+                    if self.on_failed and item[1] is not None:
+                        self.on_failed(item[1])
+                    if self.failed <= 5:
+                        print(f"Document rejected ({status}): {outcome.get('error')}")
+        if throttled:
+            self._throttle()
+        return retry
+    
+    def _throttle(self):
+        """ES answered 429 (too many requests)."""
+        with self._lock:
+            self.throttled += 1
+    
+    def _give_up(self, items):
+        with self._lock:
+            self.failed += len(items)
+            if self.on_failed:
+                for _, ack in items:
+                    if ack is not None:
+                        self.on_failed(ack)
+    
+    def close(self):
+        """Flush remaining documents and print a throughput summary."""
+        self.flush()
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        print(f"Indexed {self.indexed} docs in {elapsed:.2f}s "
+              f"({self.indexed / elapsed:.0f} docs/sec, {self.batches} batches, "
+              f"{self.bytes_sent / 1024 / 1024:.1f} MB), "
+              f"retried: {self.retried}, throttled: {self.throttled}, failed: {self.failed}")
+        return self.failed == 0
+
+class ConcurrentBulkIndexer(BulkIndexer):
+    """BulkIndexer that keeps several _bulk requests in flight.
+    
+    Full batches are handed to a pool of `concurrency` threads sharing one
+    keep-alive session; add() blocks while the in-flight limit is reached,
+    which bounds memory to a few batches. The limit adapts to backpressure:
+    every 429 halves it (down to 1) and it grows back by one after every
+    `recover_after` batches accepted without a 429, up to `concurrency`.
+    Callbacks run on the sender threads, under the indexer's lock.
+    """
+    
+    def __init__(self, concurrency=BULK_CONCURRENCY, recover_after=10, **kwargs):
+        kwargs.setdefault("session", new_session(pool_maxsize=concurrency))
+        super().__init__(**kwargs)
+        self.max_concurrency = max(1, concurrency)
+        self.concurrency = self.max_concurrency
+        self.recover_after = recover_after
+        self.in_flight = 0
+        self._clean_batches = 0
+        self._lock = threading.RLock()
+        self._slots = threading.Condition(self._lock)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="bulk")
+    
+    def flush(self):
+        """Send the buffered batch from a sender thread (waits for a free slot)."""
+        if not self._buffer:
+            return
+        items, self._buffer, self._buffer_bytes = self._buffer, [], 0
+        with self._slots:
+            while self.in_flight >= self.concurrency:
+                self._slots.wait()
+            self.in_flight += 1
+            self.batches += 1
+        self._pool.submit(self._run, items)
+    
+    def _run(self, items):
+        throttled = self.throttled
+        try:
+            self._ship(items)
+        finally:  # never leave a slot taken
+            with self._slots:
+                self.in_flight -= 1
+                if self.throttled == throttled:
+                    self._clean_batches += 1
+                    if self._clean_batches >= self.recover_after and self.concurrency < self.max_concurrency:
+                        self.concurrency += 1
+                        self._clean_batches = 0
+                self._slots.notify_all()
+    
+    def _throttle(self):
+        with self._slots:
+            self.throttled += 1
+            self._clean_batches = 0
+            self.concurrency = max(1, self.concurrency // 2)
+    
+    def drain(self):
+        """Flush and wait until every batch has been answered."""
+        self.flush()
+        with self._slots:
+            while self.in_flight:
+                self._slots.wait()
+    
+    def close(self):
+        self.drain()
+        self._pool.shutdown()
+        return super().close()
+
+def bulk_item(index, partition, doc, doc_id=None):
+    """Encoded _bulk action/source pair for a document."""
+    meta = {"_index": partition_index(index, doc.get("timestamp"), partition)}
+    if doc_id:
+        meta["_id"] = doc_id
+    action = json.dumps({"index": meta}).encode()
+    source = json.dumps(doc).encode()
+    return action + b"\n" + source + b"\n"
+
+class PushState:
+    """Local record of indexed reports and control fingerprints.
+    
+    Lets a re-run skip reports it has already pushed and, within a new report,
+    write only controls whose content changed since they were last indexed.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.reports = []
+        self.controls = {}
+        if path and os.path.exists(path):
+            with open(path, "r") as f:
+                state = json.load(f)
+            self.reports = state.get("reports", [])
+            self.controls = state.get("controls", {})
+        self._known_reports = set(self.reports)
+    
+    def has_report(self, index, digest):
+        return f"{index}|{digest}" in self._known_reports
+    
+    def add_report(self, index, digest):
+        key = f"{index}|{digest}"
+        if key not in self._known_reports:
+            self._known_reports.add(key)
+            self.reports = (self.reports + [key])[-STATE_MAX_REPORTS:]
+    
+    def forget_index(self, index):
+        """Drop what is recorded for a deleted index, so its controls are pushed again."""
+        prefix = f"{index}|"
+        self.reports = [key for key in self.reports if not key.startswith(prefix)]
+        self._known_reports = set(self.reports)
+        self.controls = {key: fp for key, fp in self.controls.items() if not key.startswith(prefix)}
+    
+    def is_unchanged(self, key, fingerprint):
+        return self.controls.get(key) == fingerprint
+    
+    def record(self, ack):
+        """on_indexed callback: remember the fingerprint of a stored control."""
+        key, fingerprint = ack
+        self.controls[key] = fingerprint
+    
+    def save(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"reports": self.reports, "controls": self.controls}, f)
+        os.replace(tmp, self.path)
+
+def file_digest(path):
+    """Content hash of a report, used as its scan identity."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def document_id(*parts):
+    """Deterministic document ID, so re-pushing the same scan overwrites instead of duplicating."""
+    return hashlib.sha1("\x1f".join(str(p) for p in parts).encode()).hexdigest()
+
+def partition_index(index, timestamp, partition):
+    """Name of the time partition a document with this ISO timestamp belongs to."""
+    if partition == "none":
+        return index
+    try:
+        when = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        when = datetime.now()
+    return f"{index}-{when.strftime(PARTITION_FORMATS[partition])}"
+
+def index_mapping():
+    """Field mapping shared by the legacy index and the partition template."""
+    return {
         "mappings": {
             "properties": {
                 "timestamp": {"type": "date"},
@@ -33,19 +389,91 @@ def create_index():
                 "resource_id": {"type": "keyword"},
                 "resource_type": {"type": "keyword"},
                 "severity": {"type": "keyword"},
-                "cis_section": {"type": "keyword"}
+                "cis_section": {"type": "keyword"},
+                "source": {"type": "keyword"}
             }
         }
     }
+
+def create_index():
+    """Create the single, unpartitioned index (only if it does not exist yet)."""
+    session = get_session()
+    if session.head(f"{ES_HOST}/{INDEX_NAME}", timeout=REQUEST_TIMEOUT).status_code == 200:
+        print(f"Index {INDEX_NAME} already exists")
+        return True
     
-    response = requests.put(f"{ES_HOST}/{INDEX_NAME}", json=mapping)
+    response = session.put(f"{ES_HOST}/{INDEX_NAME}", json=index_mapping(), timeout=REQUEST_TIMEOUT)
     print(f"Index creation: {response.status_code}")
     return response.ok
 
-def push_summary(data):
+def create_index_template(force=False):
+    """Install the template that gives every partition the mapping, settings and read alias."""
+    session = get_session()
+    url = f"{ES_HOST}/_index_template/{INDEX_NAME}"
+    if (session.head(f"{ES_HOST}/{INDEX_NAME}", timeout=REQUEST_TIMEOUT).status_code == 200 and
+            session.get(f"{ES_HOST}/_alias/{INDEX_NAME}", timeout=REQUEST_TIMEOUT).status_code == 404):
+        print(f"Error: {INDEX_NAME} is an existing unpartitioned index and cannot become the alias; "
+              f"reindex it into {INDEX_NAME}-* partitions or use --partition none")
+        return False
+    if not force and session.head(url, timeout=REQUEST_TIMEOUT).status_code == 200:
+        print(f"Index template {INDEX_NAME} already exists")
+        return True
+    
+    template = {
+        "index_patterns": [f"{INDEX_NAME}-*"],
+        "template": {
+            "settings": {
+                "number_of_shards": INDEX_SHARDS,
+                "number_of_replicas": INDEX_REPLICAS,
+                "refresh_interval": INDEX_REFRESH_INTERVAL
+            },
+            "mappings": index_mapping()["mappings"],
+            "aliases": {INDEX_NAME: {}}
+        },
+        "priority": 100
+    }
+    response = session.put(url, json=template, timeout=REQUEST_TIMEOUT)
+    print(f"Index template: {response.status_code}")
+    return response.ok
+
+def prune_partitions(days, state=None):
+    """Delete time partitions whose whole period is older than the given number of days.
+    
+    Controls recorded in state for a deleted partition are forgotten, so the
+    next push writes them again instead of skipping them as unchanged.
+    """
+    session = get_session()
+    cutoff = datetime.now() - timedelta(days=days)
+    response = session.get(f"{ES_HOST}/_cat/indices/{INDEX_NAME}-*",
+                           params={"format": "json", "h": "index"}, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    
+    deleted = 0
+    for row in response.json():
+        name = row["index"]
+        suffix = name[len(INDEX_NAME) + 1:]
+        for partition, fmt in PARTITION_FORMATS.items():
+            try:
+                start = datetime.strptime(suffix, fmt)
+            except ValueError:
+                continue
+            if partition == "daily":
+                end = start + timedelta(days=1)
+            else:
+                end = (start + timedelta(days=32)).replace(day=1)
+            if end <= cutoff:
+                result = session.delete(f"{ES_HOST}/{name}", timeout=REQUEST_TIMEOUT)
+                print(f"Deleted partition {name}: {result.status_code}")
+                deleted += result.ok
+                if result.ok and state is not None:
+                    state.forget_index(name)
+            break
+    print(f"Retention: {deleted} partitions older than {days} days removed")
+
+def push_summary(data, indexer, scan_id):
     """Push compliance summary to Elasticsearch."""
     doc = {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": data.get("timestamp") or datetime.now().isoformat(),
         "scan_type": "summary",
         "profile": data.get("profile", "aws-cis-benchmark"),
         "environment": data.get("environment", "production"),
@@ -56,71 +484,352 @@ def push_summary(data):
         "skipped_controls": data.get("skipped", 0)
     }
     
-    response = requests.post(f"{ES_HOST}/{INDEX_NAME}/_doc", json=doc)
-    print(f"Summary pushed: {response.status_code}")
-    return response.ok
+    indexer.add(doc, document_id("summary", doc["profile"], doc["environment"], scan_id))
 
-def push_controls(inspec_data):
-    """Push individual control results to Elasticsearch."""
-    profiles = inspec_data.get("profiles", [])
+def push_controls(inspec_data, indexer, scan_id, scan_time, state=None):
+    """Push individual control results to Elasticsearch.
+    
+    inspec_data is a streaming report reader (InSpec, Checkov or Custodian,
+    see compliance_lib.open_report) positioned at its profiles.
+    Controls whose content is unchanged since they were last indexed into
+    the same partition (per state) are skipped, so every new partition gets a
+    full copy. Returns the number of skipped controls.
+    """
+    skipped = 0
+    target = partition_index(indexer.index, scan_time, indexer.partition)
     
-    for profile in profiles:
+    for profile, controls in inspec_data.profiles():
         profile_name = profile.get("name", "unknown")
         
-        for control in profile.get("controls", []):
-            control_id = control.get("id", "unknown")
-            results = control.get("results", [])
-            
-            # Determine overall status
-            if not results:
-                status = "skipped"
-            elif all(r.get("status") == "passed" for r in results):
-                status = "passed"
-            else:
-                status = "failed"
-            
-            # Extract CIS section from control ID
-            cis_section = control_id.split("-")[2] if len(control_id.split("-")) > 2 else "unknown"
+        for control in controls:
+            record = ControlRecord.from_inspec(control)
+            control_id = record.id
             
             doc = {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": scan_time,
                 "scan_type": "control",
                 "profile": profile_name,
                 "control_id": control_id,
-                "control_title": control.get("title", ""),
-                "control_status": status,
-                "control_impact": control.get("impact", 0.5),
-                "cis_section": cis_section,
-                "severity": "critical" if control.get("impact", 0) >= 0.9 else "high" if control.get("impact", 0) >= 0.7 else "medium"
+                "control_title": record.title,
+                "control_status": record.status_name,
+                "control_impact": record.impact,
+                "cis_section": record.section,
+                "severity": record.severity_name,
+                "source": inspec_data.FORMAT
             }
             
-            response = requests.post(f"{ES_HOST}/{INDEX_NAME}/_doc", json=doc)
-            print(f"Control {control_id}: {response.status_code}")
+            key = f"{target}|{profile_name}|{control_id}"
+            fingerprint = document_id(record.status_name, record.impact, record.title,
+                                      record.severity_name, record.section)[:16]
+            if state and state.is_unchanged(key, fingerprint):
+                skipped += 1
+                continue
+            
+            indexer.add(doc, document_id(profile_name, control_id, scan_id), ack=(key, fingerprint))
+    
+    return skipped
+
+class BackfillCheckpoint:
+    """Append-only record of reports whose documents were all indexed.
+    
+    One JSON line per report (path and file signature), written as soon as
+    its last document is acknowledged, so an interrupted backfill resumes
+    with the reports it had not finished. A report that changed since it was
+    recorded is pushed again.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        if path and os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self.done[entry["path"]] = entry["signature"]
+                    except (ValueError, KeyError, TypeError):
+                        continue  # torn last line of an interrupted run
+        self._file = open(path, "a") if path else None
+        self._lock = threading.Lock()
+    
+    def is_done(self, path):
+        try:
+            return self.done.get(path) == file_signature(path)
+        except OSError:
+            return False
+    
+    def mark_done(self, path, signature):
+        with self._lock:
+            self.done[path] = signature
+            if self._file:
+                self._file.write(json.dumps({"path": path, "signature": signature}) + "\n")
+                self._file.flush()
+    
+    def close(self):
+        if self._file:
+            self._file.close()
+
+class _ItemCollector:
+    """Stands in for an indexer in backfill workers: encodes documents into bulk items."""
+    
+    def __init__(self, index, partition):
+        self.index = index
+        self.partition = partition
+        self.items = []
+    
+    def add(self, doc, doc_id=None, ack=None):
+        self.items.append(bulk_item(self.index, self.partition, doc, doc_id))
+
+def file_signature(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+def prepare_report(path, index=INDEX_NAME, partition="none"):
+    """Parse one report or summary into encoded bulk items (runs in backfill workers).
+    
+    Returns (path, file signature, items); every control is included, since
+    a backfill rebuilds the index rather than pushing deltas.
+    """
+    signature = file_signature(path)
+    scan_id = file_digest(path)
+    collector = _ItemCollector(index, partition)
+    with open_report(path, keep_failures=False) as reader:
+        data = reader.header()
+        if "compliance_score" in data:
+            push_summary(data, collector, scan_id)
+        elif reader.has_profiles:
+            scan_time = datetime.fromtimestamp(os.path.getmtime(path)).isoformat()
+            push_controls(reader, collector, scan_id, scan_time)
+        else:
+            raise ValueError("unknown data format")
+    return path, signature, collector.items
+
+class BackfillProgress:
+    """Outstanding documents per report; checkpoints a report once all are indexed.
+    
+    While running, a progress line is printed every `interval` seconds from a
+    background thread (so it keeps coming while the sender is backing off).
+    """
+    
+    def __init__(self, checkpoint, total):
+        self.checkpoint = checkpoint
+        self.total = total
+        self.reports_done = 0
+        self.reports_failed = 0
+        self.parse_errors = 0
+        self.started = time.monotonic()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+    
+    def start(self, indexer, interval):
+        def report():
+            while not self._stopped.wait(interval):
+                print(self.line(indexer))
+        threading.Thread(target=report, name="backfill-progress", daemon=True).start()
+    
+    def stop(self):
+        self._stopped.set()
+    
+    def expect(self, path, signature, count):
+        """Register a parsed report before its items are queued (ack = path)."""
+        if not count:
+            self._finish(path, signature, True)
+            return
+        with self._lock:
+            self._pending[path] = [count, signature, True]
+    
+    def indexed(self, path):
+        self._settle(path, True)
+    
+    def failed(self, path):
+        self._settle(path, False)
+    
+    def _settle(self, path, ok):
+        with self._lock:
+            entry = self._pending[path]
+            entry[0] -= 1
+            entry[2] = entry[2] and ok
+            if entry[0]:
+                return
+            del self._pending[path]
+        self._finish(path, entry[1], entry[2])
+    
+    def _finish(self, path, signature, ok):
+        if ok:
+            self.checkpoint.mark_done(path, signature)
+        with self._lock:
+            if ok:
+                self.reports_done += 1
+            else:
+                self.reports_failed += 1
+    
+    def line(self, indexer):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return (f"[{self.reports_done + self.reports_failed + self.parse_errors}/{self.total} reports] "
+                f"{indexer.indexed} docs, {indexer.indexed / elapsed:.0f} docs/sec, "
+                f"{indexer.bytes_sent / 1024 / 1024 / elapsed:.1f} MB/s, "
+                f"in flight {indexer.in_flight}/{indexer.concurrency}, "
+                f"throttled: {indexer.throttled}, failed: {indexer.failed}")
+
+def backfill(source, indexer_options, checkpoint_path=BACKFILL_CHECKPOINT, workers=None,
+             concurrency=BULK_CONCURRENCY, progress_every=5.0):
+    """Push every report and summary under a directory (or matching a glob).
+    
+    Reports are parsed in a process pool (at most 2x workers in flight) and
+    their documents shipped by a ConcurrentBulkIndexer. Reports already in
+    the checkpoint are skipped. Returns True if every report was indexed.
+    """
+    checkpoint = BackfillCheckpoint(checkpoint_path)
+    paths = [path for path, _ in iter_report_paths(source)]
+    todo = [path for path in paths if not checkpoint.is_done(path)]
+    print(f"Backfill: {len(paths)} reports under {source}, {len(paths) - len(todo)} already done "
+          f"(checkpoint {checkpoint_path})")
+    
+    progress = BackfillProgress(checkpoint, len(todo))
+    indexer = ConcurrentBulkIndexer(concurrency=concurrency, on_indexed=progress.indexed,
+                                    on_failed=progress.failed, **indexer_options)
+    workers = workers or os.cpu_count() or 1
+    queue = iter(todo)
+    in_flight = {}
+    interrupted = False
+    pool = ProcessPoolExecutor(max_workers=workers)
+    progress.start(indexer, progress_every)
+    try:
+        for path in queue:
+            in_flight[pool.submit(prepare_report, path, indexer.index, indexer.partition)] = path
+            if len(in_flight) >= workers * 2:
+                break
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = in_flight.pop(future)
+                try:
+                    path, signature, items = future.result()
+                except Exception as e:
+                    progress.parse_errors += 1
+                    print(f"Skipping {path}: {e}")
+                else:
+                    progress.expect(path, signature, len(items))
+                    for item in items:
+                        indexer.add_item(item, ack=path)
+                next_path = next(queue, None)
+                if next_path is not None:
+                    in_flight[pool.submit(prepare_report, next_path, indexer.index, indexer.partition)] = next_path
+    except KeyboardInterrupt:
+        print("Interrupted; finishing the batches in flight (re-run to resume)")
+        interrupted = True
+    finally:
+        pool.shutdown(cancel_futures=True)
+        ok = indexer.close()
+        progress.stop()
+        checkpoint.close()
+    print(progress.line(indexer))
+    print(f"Backfill: {progress.reports_done} reports indexed, {progress.reports_failed} incomplete, "
+          f"{progress.parse_errors} unreadable")
+    return ok and not interrupted and not progress.reports_failed and not progress.parse_errors
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python push_to_elasticsearch.py <json_file>")
-        print("Example: python push_to_elasticsearch.py ../demo/sample-outputs/compliance_summary.json")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="Push compliance data to Elasticsearch",
+        epilog="Example: python push_to_elasticsearch.py ../demo/sample-outputs/compliance_summary.json")
+    parser.add_argument("json_file", nargs="?",
+                        help="Compliance summary, or InSpec / Checkov / Cloud Custodian JSON report")
+    parser.add_argument("--batch-docs", type=int, default=BULK_MAX_DOCS,
+                        help="Maximum documents per _bulk request")
+    parser.add_argument("--batch-bytes", type=int, default=BULK_MAX_BYTES,
+                        help="Maximum _bulk request body size in bytes")
+    parser.add_argument("--max-retries", type=int, default=BULK_MAX_RETRIES,
+                        help="Retries for documents rejected with 429/5xx")
+    parser.add_argument("--state-file", default=STATE_FILE,
+                        help="Where already-indexed controls are recorded")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the state file and push every control")
+    parser.add_argument("--partition", choices=["daily", "monthly", "none"], default=INDEX_PARTITION,
+                        help=f"Time partitioning of {INDEX_NAME}-* indices ('none' writes one index)")
+    parser.add_argument("--update-template", action="store_true",
+                        help="Re-install the index template even if it exists")
+    parser.add_argument("--prune-older-than", type=int, metavar="DAYS",
+                        help="Delete partitions older than DAYS days")
+    parser.add_argument("--backfill", metavar="SOURCE",
+                        help="Push every report/summary in a directory (recursively) or matching a glob")
+    parser.add_argument("--concurrency", type=int, default=BULK_CONCURRENCY,
+                        help="Backfill: maximum _bulk requests in flight (halved on every 429)")
+    parser.add_argument("--workers", type=int,
+                        help="Backfill: processes parsing reports (default: CPU count)")
+    parser.add_argument("--checkpoint", default=BACKFILL_CHECKPOINT,
+                        help="Backfill: file recording fully indexed reports, to resume from")
+    parser.add_argument("--progress-interval", type=float, default=5.0,
+                        help="Backfill: seconds between progress lines")
+    args = parser.parse_args()
     
-    json_file = sys.argv[1]
+    state = PushState(args.state_file)
+    if args.prune_older_than is not None:
+        prune_partitions(args.prune_older_than, state)
+        state.save()
+    if args.backfill:
+        if args.partition == "none":
+            create_index()
+        elif not create_index_template(args.update_template):
+            sys.exit(1)
+        options = {"max_docs": args.batch_docs, "max_bytes": args.batch_bytes,
+                   "max_retries": args.max_retries, "partition": args.partition}
+        if not backfill(args.backfill, options, args.checkpoint, args.workers, args.concurrency,
+                        args.progress_interval):
+            sys.exit(1)
+        print("Backfill complete!")
+        return
+    if not args.json_file:
+        if args.prune_older_than is None:
+            parser.error("a JSON file, --backfill or --prune-older-than is required")
+        return
     
-    # Create index
-    create_index()
+    json_file = args.json_file
+    scan_id = file_digest(json_file)
+    # Report file time stands in for the scan time, so re-runs produce identical documents
+    scan_time = datetime.fromtimestamp(os.path.getmtime(json_file)).isoformat()
     
-    # Load and push data
-    with open(json_file, 'r') as f:
-        data = json.load(f)
+    # Stream the file; summaries are small and read whole by header()
+    with open_report(json_file, keep_failures=False) as reader:
+        data = reader.header()
+        
+        # Check if it's a summary or InSpec report
+        is_summary = "compliance_score" in data
+        if not is_summary and not reader.has_profiles:
+            print("Unknown data format")
+            sys.exit(1)
+        
+        # Reports are recorded per partition: one landing in a new partition is pushed again
+        target = partition_index(INDEX_NAME, data.get("timestamp") if is_summary else scan_time,
+                                 args.partition)
+        if state.has_report(target, scan_id) and not args.full:
+            print(f"{json_file} was already indexed, nothing to push")
+            return
+        
+        indexer = BulkIndexer(max_docs=args.batch_docs, max_bytes=args.batch_bytes,
+                              max_retries=args.max_retries, on_indexed=state.record,
+                              partition=args.partition)
+        
+        # Create index (or the template partitions are created from)
+        if args.partition == "none":
+            create_index()
+        elif not create_index_template(args.update_template):
+            sys.exit(1)
+        
+        if is_summary:
+            push_summary(data, indexer, scan_id)
+            print("Summary queued")
+        else:
+            unchanged = push_controls(reader, indexer, scan_id, scan_time,
+                                      None if args.full else state)
+            print(f"Unchanged controls skipped: {unchanged}")
     
-    # Check if it's a summary or InSpec report
-    if "compliance_score" in data:
-        push_summary(data)
-    elif "profiles" in data:
-        push_controls(data)
-    else:
-        print("Unknown data format")
+    ok = indexer.close()
+    if ok:
+        state.add_report(target, scan_id)
+    state.save()
+    if not ok:
         sys.exit(1)
-    
     print("Data pushed to Elasticsearch successfully!")
 
 if __name__ == "__main__":
@@ -1,153 +1,781 @@
 #!/usr/bin/env python3
 """
 Prometheus Exporter for CIS Compliance Metrics
-Exports compliance data from InSpec scans to Prometheus format
+Exports compliance data from InSpec scans (and Checkov / Cloud Custodian
+reports) to Prometheus format
+
+One process can serve many tenants: with TENANT_PATH_PATTERN the environment
+and account of each report come from its path (or from the report itself),
+and every (environment, account) keeps its own series.
 """
 
-from prometheus_client import start_http_server, Gauge, Counter, Histogram, Info
+from prometheus_client import start_http_server, generate_latest, Gauge, Counter, Histogram, Info, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.exposition import CONTENT_TYPE_LATEST
+import asyncio
+import cProfile
+import gzip
+import hashlib
 import json
 import time
 import os
 import sys
+import tempfile
+import threading
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
-# Prometheus metrics
-compliance_score = Gauge('cis_compliance_score', 'Overall CIS compliance score', ['environment', 'profile'])
-controls_total = Gauge('cis_controls_total', 'Total number of controls', ['environment', 'profile'])
-controls_passed = Gauge('cis_controls_passed', 'Number of passed controls', ['environment', 'profile'])
-controls_failed = Gauge('cis_controls_failed', 'Number of failed controls', ['environment', 'profile'])
-controls_skipped = Gauge('cis_controls_skipped', 'Number of skipped controls', ['environment', 'profile'])
+# Shared parsing helpers live in scripts/compliance_lib (copied next to this file in the image)
+_SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts')
+if os.path.isdir(_SCRIPTS_DIR):
+    sys.path.insert(0, _SCRIPTS_DIR)
+
+from compliance_lib import ReportWatcher, open_report
+from compliance_lib.adapters import tool_summary
+from compliance_lib.controls import PASSED, SEVERITIES, STATUSES
+from compliance_lib.history import HistoryStore
+from compliance_lib.report_cache import ReportCache
+from compliance_lib.scoring import build_batch, tally, transitions
+from compliance_lib.tenants import TenantResolver, tenant_hints
+
+# cis_control_status value per status code (passed, failed, skipped)
+STATUS_VALUES = (1, 0, -1)
+
+
+# Precomputed gauges of one profile's latest scan; sections maps each CIS
+# section to (total, score, (passed, failed, skipped))
+Rollup = namedtuple('Rollup', 'score status severity sections newly_failing newly_passing timestamp')
+
+
+class TenantCollector:
+    """Builds the per-profile compliance gauges and tenant freshness metrics
+    
+    State is kept per tenant (environment, account): the latest rollup of
+    each of its profiles plus when its newest report was written. A rollup is
+    computed once when a scan is published: score, status and severity
+    counts, pass/fail/skip per CIS section and the controls newly failing (or
+    no longer failing) since the profile's previous scan. Scrapes only copy
+    those numbers into families and never aggregate cis_control_status, so
+    dashboards and alerts can query the small rollup series instead.
+    A report only replaces the profiles it contains, so tenants and profiles
+    never overwrite each other.
+    """
+    
+    LABELS = ['environment', 'account', 'profile']
+    TENANT_LABELS = ['environment', 'account']
+    
+    def __init__(self):
+        # (environment, account) -> {'profiles': {profile: Rollup}, 'report': mtime, 'reports': n}
+        self._tenants = {}
+        self._lock = threading.Lock()
+    
+    def _state(self, tenant):
+        key = (tenant.environment, tenant.account)
+        state = self._tenants.get(key)
+        if state is None:
+            state = self._tenants[key] = {'profiles': {}, 'report': 0.0, 'reports': 0}
+        return state
+    
+    def update(self, tenant, profile, counts, timestamp, newly_failing=None, newly_passing=0):
+        """Replace the rollup of one profile of a tenant with a scan's Tally and
+        the per-severity counts of controls that started failing in that scan"""
+        sections = {section: (sum(status), _score(status), tuple(status))
+                    for section, status in counts.sections.items()}
+        rollup = Rollup(_score(counts.status), list(counts.status), dict(counts.severity), sections,
+                        dict(newly_failing or dict.fromkeys(SEVERITIES, 0)), newly_passing, timestamp)
+        with self._lock:
+            self._state(tenant)['profiles'][profile] = rollup
+    
+    def report_ingested(self, tenant, written):
+        """Record that a report of the tenant, written at epoch seconds written, was published"""
+        with self._lock:
+            state = self._state(tenant)
+            state['report'] = max(state['report'], written)
+            state['reports'] += 1
+    
+    def collect(self):
+        with self._lock:
+            tenants = [(key, dict(state['profiles']), state['report'], state['reports'])
+                       for key, state in self._tenants.items()]
+        
+        score = GaugeMetricFamily('cis_compliance_score', 'Overall CIS compliance score', labels=self.LABELS)
+        totals = GaugeMetricFamily('cis_controls_total', 'Total number of controls', labels=self.LABELS)
+        by_status = [GaugeMetricFamily(f'cis_controls_{status}', f'Number of {status} controls', labels=self.LABELS)
+                     for status in ('passed', 'failed', 'skipped')]
+        violations = GaugeMetricFamily('cis_violations_by_severity', 'Number of violations by severity',
+                                       labels=self.LABELS + ['severity'])
+        section_score = GaugeMetricFamily('cis_section_compliance_score', 'CIS compliance score of a section',
+                                          labels=self.LABELS + ['section'])
+        section_total = GaugeMetricFamily('cis_section_controls_total', 'Number of controls in a section',
+                                          labels=self.LABELS + ['section'])
+        section_status = GaugeMetricFamily('cis_section_controls', 'Number of controls in a section by status',
+                                           labels=self.LABELS + ['section', 'status'])
+        newly_failing = GaugeMetricFamily('cis_controls_newly_failing',
+                                          'Controls failing in the latest scan that did not fail in the previous one',
+                                          labels=self.LABELS + ['severity'])
+        newly_passing = GaugeMetricFamily('cis_controls_newly_passing',
+                                          'Controls failing in the previous scan that no longer fail',
+                                          labels=self.LABELS)
+        scanned = GaugeMetricFamily('cis_last_scan_timestamp', 'Timestamp of last scan', labels=self.LABELS)
+        written = GaugeMetricFamily('cis_tenant_last_report_timestamp_seconds',
+                                    'Modification time of the newest report published for the tenant',
+                                    labels=self.TENANT_LABELS)
+        age = GaugeMetricFamily('cis_tenant_report_age_seconds', 'Age of the newest report of the tenant',
+                                labels=self.TENANT_LABELS)
+        reports = CounterMetricFamily('cis_tenant_reports', 'Reports published per tenant',
+                                      labels=self.TENANT_LABELS)
+        
+        now = time.time()
+        for (environment, account), profiles, report, count in tenants:
+            for profile, rollup in profiles.items():
+                labels = [environment, account, profile]
+                score.add_metric(labels, rollup.score)
+                totals.add_metric(labels, sum(rollup.status))
+                for family, value in zip(by_status, rollup.status):
+                    family.add_metric(labels, value)
+                for sev, value in rollup.severity.items():
+                    violations.add_metric(labels + [sev], value)
+                for section, (total, section_pct, status) in rollup.sections.items():
+                    section_score.add_metric(labels + [section], section_pct)
+                    section_total.add_metric(labels + [section], total)
+                    for name, value in zip(STATUSES, status):
+                        section_status.add_metric(labels + [section, name], value)
+                for sev, value in rollup.newly_failing.items():
+                    newly_failing.add_metric(labels + [sev], value)
+                newly_passing.add_metric(labels, rollup.newly_passing)
+                scanned.add_metric(labels, rollup.timestamp)
+            written.add_metric([environment, account], report)
+            age.add_metric([environment, account], max(0.0, now - report))
+            reports.add_metric([environment, account], count)
+        
+        yield from (score, totals, *by_status, violations, section_score, section_total, section_status,
+                    newly_failing, newly_passing, scanned, written, age, reports)
+        yield GaugeMetricFamily('cis_tenants', 'Tenants (environment, account) with published reports',
+                                value=len(tenants))
+
+
+def _score(status):
+    """Compliance score (%) of [passed, failed, skipped] counts"""
+    total = sum(status)
+    return status[PASSED] / total * 100 if total > 0 else 0
+
+
+tenant_metrics = TenantCollector()
+REGISTRY.register(tenant_metrics)
+
 
-control_status = Gauge('cis_control_status', 'Status of individual control (1=pass, 0=fail)', 
-                       ['control_id', 'title', 'severity', 'section'])
+class ControlStatusCollector:
+    """Builds cis_control_status from the latest scan of each (environment, account, profile)
+
+    Each scan replaces the previous snapshot of its (environment, account,
+    profile), so retired controls and edited titles never leave orphaned
+    series behind. Cardinality is shed in two steps: above max_titled
+    controls the title label (the bulkiest, most churn-prone label) is
+    dropped, and above max_series passing controls are shed before
+    failed/skipped ones.
+    """
+    
+    LABELS = ['environment', 'account', 'profile', 'control_id', 'title', 'severity', 'section']
+    
+    def __init__(self, max_series=10000, max_titled=None):
+        self.max_series = max_series
+        self.max_titled = max_series // 2 if max_titled is None else min(max_titled, max_series)
+        self._snapshots = {}
+        self._lock = threading.Lock()
+    
+    def update(self, tenant, profile, batch):
+        """Replace the snapshot of one tenant's profile with a ControlBatch, returns the previous one"""
+        key = (tenant.environment, tenant.account, profile)
+        with self._lock:
+            previous = self._snapshots.get(key)
+            self._snapshots[key] = batch
+        return previous
+    
+    def collect(self):
+        with self._lock:
+            snapshots = list(self._snapshots.items())
+        
+        total = sum(len(batch) for _, batch in snapshots)
+        keep_titles = total <= self.max_titled
+        
+        series = [
+            (STATUS_VALUES[status], environment, account, profile, control_id,
+             title[:50] if keep_titles else '',  # Truncate long titles
+             SEVERITIES[severity], batch.sections[section])
+            for (environment, account, profile), batch in snapshots
+            for control_id, title, status, severity, section in zip(
+                batch.ids, batch.titles, batch.statuses, batch.severities, batch.section_codes)
+        ]
+        if total > self.max_series:
+            # Failed (0) and skipped (-1) sort ahead of passed (1)
+            series.sort(key=lambda s: s[0] > 0)
+            series = series[:self.max_series]
+        
+        status_family = GaugeMetricFamily('cis_control_status',
+                                          'Status of individual control (1=pass, 0=fail, -1=skip)',
+                                          labels=self.LABELS)
+        for status, *labels in series:
+            status_family.add_metric(labels, status)
+        yield status_family
+        
+        yield GaugeMetricFamily('cis_control_status_series_dropped',
+                                'Control series not exported because of CONTROL_STATUS_MAX_SERIES',
+                                value=total - len(series))
+        yield GaugeMetricFamily('cis_control_status_titles_dropped',
+                                '1 if title labels were shed to respect CONTROL_STATUS_MAX_TITLED',
+                                value=0 if keep_titles else 1)
+
+
+control_status = ControlStatusCollector(
+    int(os.getenv('CONTROL_STATUS_MAX_SERIES', 10000)),
+    int(os.environ['CONTROL_STATUS_MAX_TITLED']) if os.getenv('CONTROL_STATUS_MAX_TITLED') else None
+)
+REGISTRY.register(control_status)
 
 scan_duration = Histogram('cis_scan_duration_seconds', 'Duration of compliance scan', ['profile'])
-scan_timestamp = Gauge('cis_last_scan_timestamp', 'Timestamp of last scan', ['environment', 'profile'])
 
-violations_by_severity = Gauge('cis_violations_by_severity', 'Number of violations by severity',
-                               ['severity', 'environment'])
+# Checkov: failed resources per check severity; Cloud Custodian: actions taken
+iac_violations = Gauge('cis_iac_violations', 'Failed IaC check results (one per resource) in the latest scan',
+                       ['environment', 'account', 'profile', 'severity'])
+remediations_total = Counter('cis_remediations', 'Remediation actions taken by Cloud Custodian',
+                             ['environment', 'account', 'policy', 'action', 'status'])
+remediation_latency = Histogram('cis_remediation_latency_seconds',
+                                'Delay between the start of a Cloud Custodian run and each remediation action',
+                                ['environment', 'account', 'policy'],
+                                buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600))
+
+report_queue_depth = Gauge('cis_exporter_queue_depth', 'Reports waiting to be parsed or published')
+
+# Ingestion self-metrics: where the time of each report goes (io = file reads,
+# decode = JSON decoding and control collection, classify = bulk classification,
+# publish = tallying and metric updates)
+stage_duration = Histogram('cis_exporter_stage_seconds', 'Time spent per report in each ingestion stage',
+                           ['stage'], buckets=(.001, .005, .01, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60))
+parse_duration = Histogram('cis_exporter_parse_seconds', 'Time to parse and classify one report',
+                           buckets=(.01, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 120))
+control_duration = Histogram('cis_exporter_control_seconds', 'Parse time per control, averaged over a report',
+                             buckets=(1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, .01))
+controls_processed = Counter('cis_exporter_controls_processed', 'Controls parsed from reports')
+bytes_read = Counter('cis_exporter_read_bytes', 'Bytes of report files read')
+files_pending = Gauge('cis_exporter_files_pending', 'Changed reports not yet ingested (settling, queued or parsing)')
+parse_errors = Counter('cis_exporter_parse_errors', 'Reports that could not be parsed', ['type'])
+cache_lookups = Counter('cis_exporter_cache_lookups', 'Report cache lookups (REPORT_CACHE_DIR)', ['result'])
+last_success = Gauge('cis_exporter_last_success_timestamp_seconds', 'When a report was last ingested successfully')
 
 # Info metrics
 scan_info = Info('cis_scan', 'Information about the compliance scan')
 
+# Self-metrics of the async serving mode (EXPORTER_HTTP=async)
+render_duration = Histogram('cis_exporter_render_seconds', 'Time to render the cached /metrics payload')
+payload_bytes = Gauge('cis_exporter_payload_bytes', 'Size of the cached /metrics payload', ['encoding'])
+scrape_duration = Histogram('cis_exporter_scrape_duration_seconds', 'Time to answer a scrape', ['code'],
+                            buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1))
 
-def load_inspec_results(json_file):
-    """Load InSpec JSON results"""
-    try:
-        with open(json_file, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print(f"Error: File {json_file} not found")
-        return None
-    except json.JSONDecodeError:
-        print(f"Error: Invalid JSON in {json_file}")
-        return None
 
+class ScrapeCache:
+    """Pre-rendered exposition text (plain and gzip) of the registry
 
-def extract_metrics(inspec_data, environment='production'):
-    """Extract metrics from InSpec results"""
-    if not inspec_data:
-        return
+    Rendered once per ingested report (refresh) and, so that process and
+    self-metrics do not go stale, again when older than max_age on scrape.
+    """
     
-    profiles = inspec_data.get('profiles', [])
+    def __init__(self, registry=REGISTRY, max_age=60.0):
+        self.registry = registry
+        self.max_age = max_age
+        self._payload = None
+        self._lock = threading.Lock()
+        self._scheduled = False
     
-    for profile in profiles:
-        profile_name = profile.get('name', 'unknown')
-        controls = profile.get('controls', [])
-        
-        total = len(controls)
-        passed = 0
-        failed = 0
-        skipped = 0
-        
-        severity_counts = {'critical': 0, 'high': 0, 'medium': 0, 'low': 0}
+    def refresh(self):
+        with self._lock:
+            start = time.perf_counter()
+            body = generate_latest(self.registry)
+            compressed = gzip.compress(body, compresslevel=6)
+            etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+            render_duration.observe(time.perf_counter() - start)
+            payload_bytes.labels(encoding='identity').set(len(body))
+            payload_bytes.labels(encoding='gzip').set(len(compressed))
+            # Swapped in one assignment; readers always see a consistent payload
+            self._payload = (time.monotonic(), body, compressed, f'"{etag}"', f'"{etag}-gz"')
+    
+    def refresh_in_background(self, loop):
+        """Schedule a re-render in the loop's executor if the payload is stale"""
+        if self._scheduled or not self.is_stale():
+            return
+        self._scheduled = True
         
-        for control in controls:
-            control_id = control.get('id', 'unknown')
-            title = control.get('title', '')
-            impact = control.get('impact', 0.5)
-            
-            # Determine severity
-            if impact >= 0.9:
-                severity = 'critical'
-            elif impact >= 0.7:
-                severity = 'high'
-            elif impact >= 0.4:
-                severity = 'medium'
-            else:
-                severity = 'low'
-            
-            # Extract section from control ID (e.g., cis-aws-1.1 -> 1)
-            section = control_id.split('-')[2].split('.')[0] if '-' in control_id else 'unknown'
-            
-            results = control.get('results', [])
-            
-            # Determine control status
-            if not results:
-                skipped += 1
-                status = -1  # skipped
-            elif all(r.get('status') == 'passed' for r in results):
-                passed += 1
-                status = 1  # passed
-            else:
-                failed += 1
-                status = 0  # failed
-                severity_counts[severity] += 1
-            
-            # Set control-level metric
-            control_status.labels(
-                control_id=control_id,
-                title=title[:50],  # Truncate long titles
-                severity=severity,
-                section=section
-            ).set(status)
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._scheduled = False
+        loop.run_in_executor(None, run)
+    
+    def get(self):
+        """(rendered_at, body, gzip_body, etag, gzip_etag)"""
+        if self._payload is None:
+            self.refresh()
+        return self._payload
+    
+    def is_stale(self):
+        return self._payload is None or time.monotonic() - self._payload[0] > self.max_age
+
+
+class AsyncMetricsServer:
+    """Minimal asyncio HTTP/1.1 server answering /metrics from a ScrapeCache
+    
+    Runs its own event loop in a daemon thread, so scrapes only copy cached
+    bytes and never wait on report parsing.
+    """
+    
+    def __init__(self, cache, port, addr='0.0.0.0'):
+        self.cache = cache
+        self.port = port
+        self.addr = addr
+        self._loop = asyncio.new_event_loop()
+    
+    def start(self):
+        ready = threading.Event()
         
-        # Calculate compliance score
-        score = (passed / total * 100) if total > 0 else 0
+        def run():
+            asyncio.set_event_loop(self._loop)
+            server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.addr, self.port))
+            self.port = server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
         
-        # Set aggregate metrics
-        compliance_score.labels(environment=environment, profile=profile_name).set(score)
-        controls_total.labels(environment=environment, profile=profile_name).set(total)
-        controls_passed.labels(environment=environment, profile=profile_name).set(passed)
-        controls_failed.labels(environment=environment, profile=profile_name).set(failed)
-        controls_skipped.labels(environment=environment, profile=profile_name).set(skipped)
+        threading.Thread(target=run, name='metrics-http', daemon=True).start()
+        ready.wait()
+    
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                
+                start = time.perf_counter()
+                parts = request_line.decode('latin-1').split()
+                method, path, version = parts if len(parts) == 3 else ('', '', 'HTTP/1.0')
+                code, response = self._respond(method, path.split('?', 1)[0], headers)
+                writer.write(response)
+                await writer.drain()
+                scrape_duration.labels(code=str(code)).observe(time.perf_counter() - start)
+                
+                if version == 'HTTP/1.0' or headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+    
+    def _respond(self, method, path, headers):
+        if method not in ('GET', 'HEAD'):
+            return 405, _http_response(405, b'Method Not Allowed\n', {'Allow': 'GET, HEAD'})
+        if path not in ('/metrics', '/'):
+            return 404, _http_response(404, b'Not Found\n')
         
-        # Set violations by severity
-        for sev, count in severity_counts.items():
-            violations_by_severity.labels(severity=sev, environment=environment).set(count)
+        # Serve what we have; a stale payload is re-rendered off the event loop
+        self.cache.refresh_in_background(self._loop)
+        _, body, compressed, etag, gzip_etag = self.cache.get()
         
-        # Set scan timestamp
-        scan_timestamp.labels(environment=environment, profile=profile_name).set(time.time())
+        use_gzip = 'gzip' in headers.get('accept-encoding', '')
+        if use_gzip:
+            body, etag = compressed, gzip_etag
+        response_headers = {'Content-Type': CONTENT_TYPE_LATEST, 'ETag': etag, 'Vary': 'Accept-Encoding'}
+        if use_gzip:
+            response_headers['Content-Encoding'] = 'gzip'
         
-        print(f"✅ Metrics updated for {profile_name}:")
-        print(f"   Compliance Score: {score:.1f}%")
-        print(f"   Passed: {passed}, Failed: {failed}, Skipped: {skipped}")
+        if_none_match = [tag.strip() for tag in headers.get('if-none-match', '').split(',')]
+        if etag in if_none_match or '*' in if_none_match:
+            return 304, _http_response(304, b'', response_headers, send_body=False)
+        return 200, _http_response(200, body, response_headers, send_body=method == 'GET')
 
 
-def watch_directory(directory, environment='production'):
-    """Watch directory for new InSpec results"""
-    print(f"👀 Watching {directory} for InSpec results...")
+def _http_response(code, body, headers=None, send_body=True):
+    reason = {200: 'OK', 304: 'Not Modified', 404: 'Not Found', 405: 'Method Not Allowed'}[code]
+    lines = [f'HTTP/1.1 {code} {reason}']
+    for name, value in (headers or {}).items():
+        lines.append(f'{name}: {value}')
+    if code != 304:
+        lines.append(f'Content-Length: {len(body)}')
+    head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+    return head + body if send_body and code != 304 else head
+
+
+# Set in main() when serving from the pre-rendered cache
+scrape_cache = None
+# Set in main() when REPORT_CACHE_DIR is set
+report_cache = None
+# Replaced in main() when TENANT_PATH_PATTERN is set
+tenant_resolver = TenantResolver()
+# Content digests of reports whose remediations were counted (rewritten or touched reports count once)
+counted_reports = OrderedDict()
+MAX_COUNTED_REPORTS = 10000
+
+
+def _payload_changed():
+    """Re-render the cached scrape payload after a report was ingested"""
+    if scrape_cache is not None:
+        scrape_cache.refresh()
+
+
+def load_inspec_results(json_file):
+    """Open InSpec (or Checkov / Custodian) JSON results for streaming (controls are parsed lazily)"""
+    try:
+        return open_report(json_file, keep_failures=False)
+    except FileNotFoundError as e:
+        print(f"Error: File {json_file} not found")
+        parse_errors.labels(type=type(e).__name__).inc()
+    except (OSError, ValueError) as e:
+        _parse_failed(json_file, e)
+    return None
+
+
+def extract_metrics(inspec_data, environment='production'):
+    """Extract metrics from InSpec results, returns True if the report parsed cleanly"""
+    if not inspec_data:
+        return False
+    
+    try:
+        with inspec_data:
+            summaries, tool, stats = _summarize(inspec_data)
+    except (OSError, ValueError) as e:
+        _parse_failed(inspec_data.path, e)
+        return False
+    if not _is_report(inspec_data.path, stats):
+        return False
+    tenant = resolve_tenant(inspec_data.path, stats, environment)
+    publish_report(summaries, tool, stats, tenant, inspec_data.path)
+    _report_ingested(inspec_data.path, tenant)
+    _cache_report(inspec_data.path, summaries, tool, stats)
+    return True
+
+
+def load_cached(json_file, environment):
+    """Publish a report from the report cache, returns False if it has to be parsed"""
+    if report_cache is None:
+        return False
+    try:
+        cached = report_cache.get(report_cache.digest(json_file))
+    except OSError:
+        return False
+    cache_lookups.labels(result='hit' if cached else 'miss').inc()
+    if cached is None:
+        return False
+    tenant = resolve_tenant(json_file, cached.stats, environment)
+    for summary in cached.batches:
+        publish_profile_summary(summary, tenant)
+    publish_tool_summary(cached.tool, tenant, json_file)
+    _report_ingested(json_file, tenant)
+    try:
+        report_cache.save_index()
+    except OSError as e:
+        print(f"⚠️ Could not save the report cache index: {e}")
+    return True
+
+
+def _cache_report(path, summaries, tool, stats):
+    """Store a parsed report under the digest it was looked up with (skipped if it changed since)"""
+    if report_cache is None:
+        return
+    digest = report_cache.known_digest(path)
+    if digest is None:
+        return
+    try:
+        report_cache.put(digest, summaries, tool, stats, path=path)
+        report_cache.save_index()
+    except OSError as e:
+        print(f"⚠️ Could not cache {path}: {e}")
+
+
+def summarize_profile(profile, controls, timings=None):
+    """Classify a profile's streamed controls into a compact, picklable ControlBatch"""
+    return build_batch(profile.get('name', 'unknown'), controls, timings=timings)
+
+
+def summarize_report(json_file):
+    """Parse a report into per-profile summaries, its tool summary and parse stats (runs in pool workers)"""
+    with open_report(json_file, keep_failures=False) as reader:
+        return _summarize(reader)
+
+
+def _summarize(reader):
+    timings = {'classify': 0.0}
+    start = time.perf_counter()
+    summaries = [summarize_profile(profile, controls, timings) for profile, controls in reader.profiles()]
+    elapsed = time.perf_counter() - start
+    statistics = reader.metadata.get('statistics')
+    duration = statistics.get('duration') if isinstance(statistics, dict) else None
+    stats = {
+        'seconds': elapsed,
+        'io': reader.read_seconds,
+        'decode': max(0.0, elapsed - reader.read_seconds - timings['classify']),
+        'classify': timings['classify'],
+        'bytes': reader.bytes_read,
+        'controls': sum(len(summary) for summary in summaries),
+        # InSpec's own run time of the scan
+        'scan_duration': duration if isinstance(duration, (int, float)) else None,
+        # Environment / account named in the report itself
+        'tenant': tenant_hints(reader.metadata),
+        # False for JSON files that are not reports (e.g. the generator's summaries)
+        'has_profiles': reader.has_profiles
+    }
+    return summaries, tool_summary(reader), stats
+
+
+def _is_report(path, stats):
+    """False (and logged) for a JSON file without profiles: it is neither
+    published nor counted as a report of its tenant"""
+    if stats.get('has_profiles', True):
+        return True
+    print(f"⏭️ Skipping {os.path.basename(path)}: not a report (no profiles)")
+    return False
+
+
+def resolve_tenant(path, stats, environment):
+    """Tenant of a report from its path, its metadata hints (in stats) and the default environment"""
+    return tenant_resolver.resolve(path, (stats or {}).get('tenant'), environment)
+
+
+def _report_ingested(path, tenant):
+    try:
+        written = os.path.getmtime(path)
+    except OSError:
+        written = time.time()
+    tenant_metrics.report_ingested(tenant, written)
+    last_success.set_to_current_time()
+
+
+def _ingest(json_file, environment):
+    if load_cached(json_file, environment):
+        return True
+    return extract_metrics(load_inspec_results(json_file), environment)
+
+
+def _profiled(profile_path, func, path, *args):
+    """Run func(path, *args), under cProfile with the stats dumped to profile_path if given"""
+    if not profile_path:
+        return func(path, *args)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, path, *args)
+    finally:
+        profiler.dump_stats(profile_path)
+        print(f"🔬 Profile of {os.path.basename(path)} written to {profile_path}")
+
+
+def _parse_failed(path, error):
+    if isinstance(error, json.JSONDecodeError):
+        print(f"Error: Invalid JSON in {path}: {error.msg}")
+    else:
+        print(f"❌ Error processing {path}: {error}")
+    parse_errors.labels(type=type(error).__name__).inc()
+
+
+def load_history(path, environment):
+    """Publish the latest recorded scan of every profile from a history database
+    
+    Only scans of environment are loaded, unless a tenant path pattern is
+    set: then every environment is, each under the tenant of the report it
+    was recorded from. Returns {report path: time of its newest scan} for the
+    scans whose source report is known; only those reports can be skipped.
+    """
+    try:
+        store = HistoryStore(path, readonly=True)
+    except FileNotFoundError:
+        print(f"⚠️ History database {path} not found")
+        return {}
+    sources = {}
+    with store:
+        latest = store.latest_scans(None if tenant_resolver.pattern else environment)
+        for scan, ts, env, profile in latest:
+            source = store.scan_source(scan)
+            tenant = tenant_resolver.resolve(source, None, env)
+            publish_profile_summary(store.load_batch(scan, env, profile), tenant, ts)
+            tenant_metrics.report_ingested(tenant, ts)
+            if source:
+                # Scan times are whole seconds
+                sources[source] = max(sources.get(source, 0), ts + 1)
+    return sources
+
+
+def publish_report(summaries, tool, stats, tenant, path=None):
+    """Publish a parsed report (summaries, tool summary and parse stats) of path for a tenant"""
+    start = time.perf_counter()
+    for summary in summaries:
+        publish_profile_summary(summary, tenant)
+        if stats['scan_duration'] is not None:
+            scan_duration.labels(profile=summary.profile).observe(stats['scan_duration'])
+    publish_tool_summary(tool, tenant, path)
+    
+    for stage in ('io', 'decode', 'classify'):
+        stage_duration.labels(stage=stage).observe(stats[stage])
+    stage_duration.labels(stage='publish').observe(time.perf_counter() - start)
+    parse_duration.observe(stats['seconds'])
+    if stats['controls']:
+        control_duration.observe(stats['seconds'] / stats['controls'])
+    controls_processed.inc(stats['controls'])
+    bytes_read.inc(stats['bytes'])
+
+
+def publish_profile_summary(summary, tenant, timestamp=None):
+    """Update metrics for a single profile of a tenant from its ControlBatch"""
+    profile_name = summary.profile
+    if tenant.profile and profile_name.lower() == 'unknown':
+        profile_name = tenant.profile
+    counts = tally(summary)
+    total = counts.total
+    passed, failed, skipped = counts.status
+    
+    # Publish control-level series for this scan, replacing the previous one
+    previous = control_status.update(tenant, profile_name, summary)
+    newly_failing, newly_passing = transitions(previous, summary)
+    
+    # Replace the profile's rollup (score, status, severity, section and newly failing gauges)
+    tenant_metrics.update(tenant, profile_name, counts, timestamp or time.time(), newly_failing, newly_passing)
+    score = (passed / total * 100) if total > 0 else 0
+    
+    account = f"/{tenant.account}" if tenant.account else ''
+    print(f"✅ Metrics updated for {profile_name} ({tenant.environment}{account}):")
+    print(f"   Compliance Score: {score:.1f}%")
+    print(f"   Passed: {passed}, Failed: {failed}, Skipped: {skipped}")
+    if previous is not None and (any(newly_failing.values()) or newly_passing):
+        print(f"   Newly failing: {sum(newly_failing.values())}, no longer failing: {newly_passing}")
+
+
+def publish_tool_summary(summary, tenant, path=None):
+    """Update the Checkov / Cloud Custodian metrics of a report's tool summary
     
-    seen_files = set()
+    Remediations are counters: they are only counted the first time the
+    content of the report at path is seen (always when path is None).
+    """
+    environment, account = tenant.environment, tenant.account
+    for profile, counts in summary.get('iac_violations', {}).items():
+        for sev, count in counts.items():
+            iac_violations.labels(environment=environment, account=account, profile=profile,
+                                  severity=sev).set(count)
+    if not (summary.get('remediations') or summary.get('remediation_latencies')):
+        return
+    if path is not None and not _first_seen(path):
+        print(f"   Remediations of {os.path.basename(path)} already counted")
+        return
+    for (policy, action, status), count in summary.get('remediations', {}).items():
+        remediations_total.labels(environment=environment, account=account, policy=policy,
+                                  action=action, status=status).inc(count)
+    for policy, seconds in summary.get('remediation_latencies', ()):
+        remediation_latency.labels(environment=environment, account=account, policy=policy).observe(seconds)
+
+
+def _first_seen(path):
+    """True the first time a report's content is seen (by digest)"""
+    try:
+        if report_cache is not None:
+            digest = report_cache.digest(path)
+        else:
+            with open(path, 'rb') as f:
+                digest = hashlib.file_digest(f, 'blake2b').hexdigest()
+    except OSError:
+        return True
+    if digest in counted_reports:
+        counted_reports.move_to_end(digest)
+        return False
+    counted_reports[digest] = None
+    if len(counted_reports) > MAX_COUNTED_REPORTS:
+        counted_reports.popitem(last=False)
+    return True
+
+
+def _publish_future(filepath, future, environment):
+    """Publish a pool result on the main thread, returns True if it was published"""
+    try:
+        summaries, tool, stats = future.result()
+    except Exception as e:
+        _parse_failed(filepath, e)
+        return False
+    if not _is_report(filepath, stats):
+        return False
+    tenant = resolve_tenant(filepath, stats, environment)
+    publish_report(summaries, tool, stats, tenant, filepath)
+    _report_ingested(filepath, tenant)
+    _cache_report(filepath, summaries, tool, stats)
+    return True
+
+
+def watch_directory(directory, environment='production', workers=0, ignore_before=None, recursive=False):
+    """Watch directory (and its subdirectories if recursive) for new or rewritten InSpec results
+    
+    With workers > 0, reports are parsed and aggregated in a process pool and
+    only their per-profile summaries are published here, in arrival order.
+    Reports in ignore_before ({path: epoch seconds}) last changed before
+    their time are skipped until they change again. With EXPORTER_PROFILE_EVERY=N, every Nth report
+    is parsed under cProfile and its stats are dumped to EXPORTER_PROFILE_DIR.
+    """
+    watcher = ReportWatcher(
+        directory,
+        mode=os.getenv('WATCH_MODE', 'auto'),
+        poll_interval=float(os.getenv('WATCH_POLL_INTERVAL', 10)),
+        settle_time=float(os.getenv('WATCH_SETTLE_SECONDS', 2)),
+        max_tracked=int(os.getenv('WATCH_MAX_TRACKED', 10000)),
+        ignore_before=ignore_before,
+        recursive=recursive
+    )
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    in_flight = deque()
+    profile_every = int(os.getenv('EXPORTER_PROFILE_EVERY', 0))
+    profile_dir = os.getenv('EXPORTER_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'cis-exporter-profiles'))
+    if profile_every > 0:
+        os.makedirs(profile_dir, exist_ok=True)
+    processed = 0
+    backlog = None
+    print(f"👀 Watching {directory} for InSpec results...")
     
     while True:
         try:
-            # Check for JSON files
-            if os.path.exists(directory):
-                for filename in os.listdir(directory):
-                    if filename.endswith('.json') and filename not in seen_files:
-                        filepath = os.path.join(directory, filename)
-                        print(f"📊 Processing new file: {filename}")
-                        
-                        data = load_inspec_results(filepath)
-                        if data:
-                            extract_metrics(data, environment)
-                            seen_files.add(filename)
+            changed = watcher.poll(0.2 if in_flight else None)
+            published = False
+            for i, filepath in enumerate(changed):
+                files_pending.set(watcher.pending + len(in_flight) + len(changed) - i)
+                print(f"📊 Processing changed file: {os.path.basename(filepath)} ({watcher.backend})")
+                processed += 1
+                profile_path = None
+                if profile_every > 0 and processed % profile_every == 0:
+                    profile_path = os.path.join(profile_dir, f"{os.path.basename(filepath)}.{processed}.prof")
+                
+                # A file that fails to parse is retried once it changes again
+                if pool and load_cached(filepath, environment):
+                    published = True
+                elif pool:
+                    in_flight.append((filepath, pool.submit(_profiled, profile_path, summarize_report, filepath)))
+                elif _profiled(profile_path, _ingest, filepath, environment):
+                    published = True
             
-            time.sleep(10)  # Check every 10 seconds
+            # Publish in submission order so the newest report of a profile wins
+            while in_flight and in_flight[0][1].done():
+                filepath, future = in_flight.popleft()
+                published = _publish_future(filepath, future, environment) or published
+            
+            # Backlog gauges first, so the re-rendered payload includes them
+            report_queue_depth.set(len(in_flight))
+            files_pending.set(watcher.pending + len(in_flight))
+            if published or backlog != (len(in_flight), watcher.pending):
+                backlog = (len(in_flight), watcher.pending)
+                _payload_changed()
             
         except KeyboardInterrupt:
             print("\n👋 Shutting down exporter...")
+            watcher.close()
+            if pool:
+                pool.shutdown(cancel_futures=True)
             break
         except Exception as e:
             print(f"❌ Error: {e}")
@@ -158,13 +786,35 @@ def main():
     port = int(os.getenv('EXPORTER_PORT', 9090))
     environment = os.getenv('ENVIRONMENT', 'production')
     watch_dir = os.getenv('INSPEC_RESULTS_DIR', 'reports')
+    workers = int(os.getenv('EXPORTER_WORKERS', 0))
+    history_db = os.getenv('HISTORY_DB')
+    http_mode = os.getenv('EXPORTER_HTTP', 'threaded')
+    cache_dir = os.getenv('REPORT_CACHE_DIR')
+    tenant_pattern = os.getenv('TENANT_PATH_PATTERN')
     
     print(f"🚀 Starting CIS Compliance Prometheus Exporter on port {port}")
     print(f"   Environment: {environment}")
+    print(f"   Tenants: {tenant_pattern or 'single'}")
     print(f"   Watching: {watch_dir}")
+    print(f"   Workers: {workers or 'inline'}")
+    print(f"   HTTP: {http_mode}")
+    print(f"   Report cache: {cache_dir or 'off'}")
+    
+    if tenant_pattern:
+        global tenant_resolver
+        tenant_resolver = TenantResolver(tenant_pattern, root=watch_dir)
+    
+    if cache_dir:
+        global report_cache
+        report_cache = ReportCache(cache_dir, int(float(os.getenv('REPORT_CACHE_MAX_MB', 256)) * 1024 * 1024))
     
     # Start HTTP server for Prometheus to scrape
-    start_http_server(port)
+    if http_mode == 'async':
+        global scrape_cache
+        scrape_cache = ScrapeCache(max_age=float(os.getenv('SCRAPE_CACHE_MAX_AGE', 60)))
+        AsyncMetricsServer(scrape_cache, port).start()
+    else:
+        start_http_server(port)
     
     # Set scan info
     scan_info.info({
@@ -173,16 +823,24 @@ def main():
         'exporter': 'cis-compliance-exporter'
     })
     
+    # Restore the last known state from the history instead of re-parsing reports
+    history_sources = {}
+    if history_db:
+        print(f"📂 Loading latest scans from history {history_db}")
+        history_sources = load_history(history_db, environment)
+    
     # Load initial data if exists
     initial_file = os.path.join(watch_dir, 'inspec_aws_report.json')
-    if os.path.exists(initial_file):
+    if not history_sources and os.path.exists(initial_file):
         print(f"📂 Loading initial data from {initial_file}")
-        data = load_inspec_results(initial_file)
-        if data:
-            extract_metrics(data, environment)
+        # The watcher's first scan skips it unless it changes from here on (1ms float slack)
+        history_sources[initial_file] = os.stat(initial_file).st_ctime + 1e-3
+        _ingest(initial_file, environment)
+    _payload_changed()
     
-    # Watch for new files
-    watch_directory(watch_dir, environment)
+    # Watch for new files (reports already published from the history or above are skipped)
+    watch_directory(watch_dir, environment, workers, ignore_before=history_sources,
+                    recursive=tenant_resolver.pattern is not None)
 
 
 if __name__ == '__main__':
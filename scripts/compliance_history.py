@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Compliance History CLI
+
+Records InSpec scans into the local SQLite history store and answers trend
+questions from it: score over time, when a control started failing and the
+mean time to remediate.
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+from compliance_lib import open_report
+from compliance_lib.history import HistoryStore, from_epoch
+from compliance_lib.scoring import build_batch
+
+DEFAULT_DB = os.getenv('COMPLIANCE_HISTORY_DB', 'reports/compliance_history.db')
+
+
+def record(store: HistoryStore, args):
+    for path in args.reports:
+        timestamp = args.timestamp or datetime.fromtimestamp(os.path.getmtime(path)).isoformat()
+        with open_report(path, keep_failures=False) as reader:
+            batches = [build_batch(profile.get('name', 'Unknown'), controls)
+                       for profile, controls in reader.profiles()]
+        scan = store.record_scan(batches, timestamp, args.environment, source=path)
+        print(f"Recorded {path} as scan {scan} ({sum(len(b) for b in batches)} controls, {timestamp})")
+
+
+def latest(store: HistoryStore, args):
+    rows = [{'scan': scan, 'timestamp': from_epoch(ts), 'environment': env, 'profile': profile}
+            for scan, ts, env, profile in store.latest_scans(args.environment)]
+    _print(rows, args.json, ['scan', 'timestamp', 'environment', 'profile'])
+
+
+def trend(store: HistoryStore, args):
+    rows = store.score_trend(args.days, args.environment, args.profile, args.section)
+    _print(rows, args.json, ['timestamp', 'environment', 'profile', 'compliance_score',
+                             'passed', 'failed', 'skipped'])
+
+
+def first_failure(store: HistoryStore, args):
+    rows = store.first_failure(args.control_id, args.environment, args.profile)
+    if not rows and not args.json:
+        print(f"No history for {args.control_id}")
+        return
+    _print(rows, args.json, ['environment', 'profile', 'status', 'failing_since', 'first_failed',
+                             'last_passed', 'scans'])
+
+
+def mttr(store: HistoryStore, args):
+    result = store.mttr(args.days, args.environment, args.profile)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    if result['mttr_seconds'] is None:
+        print("No remediated failures in the selected window")
+    else:
+        print(f"Mean time to remediate: {_duration(result['mttr_seconds'])} "
+              f"over {result['remediations']} remediations")
+    print(f"Controls still failing: {result['open_failures']}")
+    if result['slowest_controls']:
+        print("\nSlowest to remediate:")
+        for control in result['slowest_controls']:
+            print(f"  {control['control_id']:<20} {_duration(control['mttr_seconds']):>10} "
+                  f"({control['remediations']}x)")
+
+
+def _duration(seconds: float) -> str:
+    if seconds >= 86400:
+        return f"{seconds / 86400:.1f}d"
+    if seconds >= 3600:
+        return f"{seconds / 3600:.1f}h"
+    return f"{seconds / 60:.0f}m"
+
+
+def _print(rows, as_json, columns):
+    if as_json:
+        print(json.dumps(rows, indent=2))
+        return
+    cells = [['-' if row[column] is None else str(row[column]) for column in columns] for row in rows]
+    widths = [max([len(column)] + [len(line[i]) for line in cells]) for i, column in enumerate(columns)]
+    print('  '.join(column.ljust(width) for column, width in zip(columns, widths)).rstrip())
+    for line in cells:
+        print('  '.join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Record InSpec scans and query compliance history',
+        epilog='Example: python compliance_history.py first-failure cis-aws-2.1')
+    parser.add_argument('--db', default=DEFAULT_DB, help=f'History database (default: {DEFAULT_DB})')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('record', help='Append InSpec (or Checkov / Custodian) JSON reports to the history')
+    p.add_argument('reports', nargs='+')
+    p.add_argument('--environment', default='production')
+    p.add_argument('--timestamp', help='Scan time (ISO-8601); defaults to each file\'s mtime')
+    p.set_defaults(func=record)
+
+    p = sub.add_parser('latest', help='Newest scan of every environment/profile')
+    p.add_argument('--environment')
+    p.set_defaults(func=latest)
+
+    p = sub.add_parser('trend', help='Compliance score per scan')
+    p.add_argument('--days', type=int, help='Only the last N days')
+    p.add_argument('--environment')
+    p.add_argument('--profile')
+    p.add_argument('--section', help='Score of a single CIS section (e.g. 2)')
+    p.set_defaults(func=trend)
+
+    p = sub.add_parser('first-failure', help='When a control started failing')
+    p.add_argument('control_id')
+    p.add_argument('--environment')
+    p.add_argument('--profile')
+    p.set_defaults(func=first_failure)
+
+    p = sub.add_parser('mttr', help='Mean time to remediate failed controls')
+    p.add_argument('--days', type=int, help='Only episodes in the last N days')
+    p.add_argument('--environment')
+    p.add_argument('--profile')
+    p.set_defaults(func=mttr)
+
+    args = parser.parse_args()
+    try:
+        store = HistoryStore(args.db, readonly=args.command != 'record')
+    except FileNotFoundError:
+        sys.exit(f"Error: history database {args.db} not found (record a scan first)")
+    with store:
+        args.func(store, args)
+
+
+if __name__ == '__main__':
+    main()
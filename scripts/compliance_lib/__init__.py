@@ -0,0 +1,11 @@
+"""
+Shared helpers for the compliance tooling (report generator, Prometheus
+exporter and Elasticsearch pusher).
+"""
+
+from .adapters import CheckovStreamReader, CustodianStreamReader, detect_format, open_report
+from .inspec_stream import InSpecStreamReader
+from .watcher import ReportWatcher
+
+__all__ = ['CheckovStreamReader', 'CustodianStreamReader', 'InSpecStreamReader', 'ReportWatcher',
+           'detect_format', 'open_report']
@@ -0,0 +1,284 @@
+"""
+Streaming readers for Checkov and Cloud Custodian reports.
+
+Both subclass InSpecStreamReader and normalize their tool's results into the
+same per-control records (id, title, impact, result counts and, optionally,
+failed-result messages), so everything downstream of ``profiles()`` handles
+them like an InSpec report:
+
+* Checkov: every check id is a control and every resource it was evaluated
+  on is one result. Each framework report (``check_type``) is a profile.
+* Cloud Custodian: every policy is a control and every resource it found is
+  one result, passed once remediated. A policy that found nothing passes.
+
+``open_report`` picks the reader from the report's top-level members; append
+a subclass to READERS to support another format.
+"""
+
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .controls import DEFAULT_IMPACT, SEVERITIES, classify_severity
+from .inspec_stream import _SCALARS, CHUNK_SIZE, InSpecStreamReader
+
+# Tool severity label -> InSpec impact (Checkov reports without a platform API key carry none)
+SEVERITY_IMPACTS = {'CRITICAL': 1.0, 'HIGH': 0.7, 'MEDIUM': 0.5, 'LOW': 0.3, 'INFO': 0.0}
+CHECKOV_RESULTS = {'passed_checks': 'passed', 'failed_checks': 'failed', 'skipped_checks': 'skipped'}
+
+CUSTODIAN_PROFILE = 'cloud-custodian'
+REMEDIATED = 'success'
+# CIS reference in a policy description ("CIS 2.1.1: Ensure ...") -> section
+_CIS_REFERENCE = re.compile(r'\bCIS\s+(\d+)(?:\.\d+)*')
+
+
+class CheckovStreamReader(InSpecStreamReader):
+    """Incremental reader for ``checkov -o json`` output
+
+    A run over several frameworks is a list of per-framework reports; each
+    becomes a profile named ``checkov-<check_type>``. A check's results are
+    spread over the passed/failed/skipped arrays, so a framework's controls
+    are complete (and yielded) only once its ``results`` have been read.
+    ``violations`` counts failed resources per profile and severity.
+    """
+
+    FORMAT = 'checkov'
+    STREAM_KEY = 'results'
+    SIGNATURE_KEYS = ('check_type', 'results')
+
+    def __init__(self, path: str, keep_failures: bool = True, chunk_size: int = CHUNK_SIZE):
+        super().__init__(path, keep_failures, chunk_size)
+        self.violations: Dict[str, Dict[str, int]] = {}
+
+    def header(self) -> Dict[str, Any]:
+        if self._state == 'start' and self._peek() == '[':
+            self.has_profiles = True
+            self._state = 'list'
+            return self.metadata
+        return super().header()
+
+    def profiles(self):
+        self.header()
+        if self._state != 'list':
+            yield from super().profiles()
+            return
+        self._state = 'reading'
+        for _ in self._items():
+            report: Dict[str, Any] = {}
+            for key in self._members():
+                if key == self.STREAM_KEY:
+                    yield self._results(report)
+                else:
+                    value = self._value()
+                    if isinstance(value, _SCALARS):
+                        report[key] = value
+        self._finish()
+
+    def _stream(self):
+        yield self._results(self.metadata)
+
+    def _results(self, report: Dict[str, Any]):
+        checks: Dict[str, Dict[str, Any]] = {}
+        if self._peek() == '{':
+            for key in self._members():
+                status = CHECKOV_RESULTS.get(key)
+                if status is None or self._peek() != '[':
+                    self._value()
+                    continue
+                for _ in self._items():
+                    check = self._value()
+                    if isinstance(check, dict):
+                        self._add_check(checks, status, check)
+        else:
+            self._value()
+
+        check_type = report.get('check_type')
+        name = f"checkov-{check_type}" if check_type else 'checkov'
+        violations = self.violations.setdefault(name, dict.fromkeys(SEVERITIES, 0))
+        for control in checks.values():
+            violations[SEVERITIES[classify_severity(control['impact'])]] += control['failed_count']
+        return {'name': name, 'check_type': check_type}, iter(checks.values())
+
+    def _add_check(self, checks: Dict[str, Dict[str, Any]], status: str, check: Dict[str, Any]):
+        check_id = check.get('check_id') or 'unknown'
+        control = checks.get(check_id)
+        if control is None:
+            control = checks[check_id] = {
+                'id': check_id,
+                'title': check.get('check_name') or '',
+                'impact': SEVERITY_IMPACTS.get(str(check.get('severity')).upper(), DEFAULT_IMPACT),
+                'result_count': 0,
+                'passed_count': 0,
+                'failed_count': 0
+            }
+            if self.keep_failures:
+                control['failures'] = []
+        control['result_count'] += 1
+        if status == 'passed':
+            control['passed_count'] += 1
+        elif status == 'failed':
+            control['failed_count'] += 1
+            if self.keep_failures:
+                control['failures'].append(_checkov_failure(check))
+
+
+class CustodianStreamReader(InSpecStreamReader):
+    """Incremental reader for Cloud Custodian run reports
+
+    The whole run is one ``cloud-custodian`` profile. Actions taken are
+    counted per (policy, action, status) in ``remediations``; their delay
+    after the start of the run is available from ``remediation_latencies``
+    once the report has been read.
+    """
+
+    FORMAT = 'custodian'
+    STREAM_KEY = 'policies'
+    SIGNATURE_KEYS = ('policies', 'execution_id', 'policies_executed')
+
+    def __init__(self, path: str, keep_failures: bool = True, chunk_size: int = CHUNK_SIZE):
+        super().__init__(path, keep_failures, chunk_size)
+        self.remediations: Dict[Tuple[str, str, str], int] = {}
+        self._action_times: List[Tuple[str, float]] = []
+
+    def remediation_latencies(self) -> List[Tuple[str, float]]:
+        """(policy, seconds from the start of the run) of every timed action"""
+        start = _epoch(self.metadata.get('timestamp'))
+        if start is None:
+            return []
+        return [(policy, max(0.0, ts - start)) for policy, ts in self._action_times]
+
+    def _stream(self):
+        if self._peek() != '[':
+            self._value()
+            return
+        profile = {'name': CUSTODIAN_PROFILE}
+        for key in ('execution_id', 'mode'):
+            if key in self.metadata:
+                profile[key] = self.metadata[key]
+        controls = self._policies()
+        yield profile, controls
+        for _ in controls:  # drain whatever the caller left unread
+            pass
+
+    def _policies(self):
+        for _ in self._items():
+            yield self._policy()
+
+    def _policy(self) -> Dict[str, Any]:
+        policy: Dict[str, Any] = {}
+        actions = []
+        for key in self._members():
+            if key == 'actions_taken' and self._peek() == '[':
+                for _ in self._items():
+                    action = self._value()
+                    if isinstance(action, dict):
+                        actions.append((action.get('action', 'unknown'), action.get('status', 'unknown'),
+                                        action.get('resource_id'), action.get('timestamp'),
+                                        action.get('error')))
+            else:
+                value = self._value()
+                if isinstance(value, _SCALARS):
+                    policy[key] = value
+
+        name = policy.get('name') or 'unknown'
+        fixed = set()
+        failures = []
+        for action, status, resource, timestamp, error in actions:
+            key = (name, action, status)
+            self.remediations[key] = self.remediations.get(key, 0) + 1
+            ts = _epoch(timestamp)
+            if ts is not None:
+                self._action_times.append((name, ts))
+            if status == REMEDIATED:
+                fixed.add(resource)
+            elif self.keep_failures:
+                failures.append({'message': error or f"{action} {status}", 'code_desc': str(resource)})
+
+        remediated = policy.get('resources_remediated')
+        remediated = len(fixed) if not isinstance(remediated, int) else remediated
+        found = max(policy.get('resources_found') or 0, remediated)
+        passed = min(remediated, found)
+        description = (policy.get('description') or '').strip()
+        reference = _CIS_REFERENCE.search(description)
+        control = {
+            'id': name,
+            'title': description.splitlines()[0] if description else policy.get('resource_type', ''),
+            'section': reference.group(1) if reference else 'unknown',
+            'impact': SEVERITY_IMPACTS.get(str(policy.get('severity')).upper(), DEFAULT_IMPACT),
+            # Nothing found is one passing evaluation rather than no results at all
+            'result_count': found or 1,
+            'passed_count': passed if found else 1,
+            'failed_count': found - passed
+        }
+        if self.keep_failures:
+            if found > passed and not failures:
+                failures.append({'message': f"{found - passed} of {found} resources not remediated "
+                                            f"({policy.get('resource_type', 'unknown')})"})
+            control['failures'] = failures if found > passed else []
+        return control
+
+
+# Tried in order by detect_format; the first whose SIGNATURE_KEYS match wins
+READERS = [InSpecStreamReader, CheckovStreamReader, CustodianStreamReader]
+
+
+def detect_format(path: str) -> str:
+    """Format of a report, from its first identifying top-level member
+
+    Defaults to InSpec, whose reader also handles compliance summaries.
+    """
+    with InSpecStreamReader(path, keep_failures=False, chunk_size=4096) as sniffer:
+        char = sniffer._peek()
+        if char == '[':
+            return CheckovStreamReader.FORMAT
+        if char == '{':
+            for key in sniffer._members():
+                for reader in READERS:
+                    if key in reader.SIGNATURE_KEYS:
+                        return reader.FORMAT
+                sniffer._value()
+    return InSpecStreamReader.FORMAT
+
+
+def open_report(path: str, keep_failures: bool = True, report_format: Optional[str] = None,
+                chunk_size: int = CHUNK_SIZE) -> InSpecStreamReader:
+    """Streaming reader for an InSpec, Checkov or Cloud Custodian report"""
+    report_format = report_format or detect_format(path)
+    for reader in READERS:
+        if reader.FORMAT == report_format:
+            return reader(path, keep_failures=keep_failures, chunk_size=chunk_size)
+    raise ValueError(f"Unknown report format: {report_format}")
+
+
+def tool_summary(reader: InSpecStreamReader) -> Dict[str, Any]:
+    """Tool-specific figures of a fully read report (picklable)
+
+    ``iac_violations``: failed resources per profile and severity (Checkov).
+    ``remediations``: actions per (policy, action, status) and
+    ``remediation_latencies``: (policy, seconds) per action (Custodian).
+    """
+    summary: Dict[str, Any] = {'format': reader.FORMAT}
+    if isinstance(reader, CheckovStreamReader):
+        summary['iac_violations'] = reader.violations
+    if isinstance(reader, CustodianStreamReader):
+        summary['remediations'] = reader.remediations
+        summary['remediation_latencies'] = reader.remediation_latencies()
+    return summary
+
+
+def _checkov_failure(check: Dict[str, Any]) -> Dict[str, Any]:
+    location = check.get('file_path') or 'unknown'
+    lines = check.get('file_line_range')
+    if isinstance(lines, list) and len(lines) == 2:
+        location = f"{location}:{lines[0]}-{lines[1]}"
+    return {'message': f"{check.get('resource', 'unknown')} ({location})",
+            'code_desc': check.get('guideline') or check.get('check_id', 'unknown')}
+
+
+def _epoch(timestamp: Any) -> Optional[float]:
+    if not isinstance(timestamp, str):
+        return None
+    try:
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
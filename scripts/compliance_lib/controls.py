@@ -0,0 +1,178 @@
+"""
+Normalized control records shared by the exporter, report generator and
+Elasticsearch pusher.
+
+Status, severity and CIS section are derived here, once per control, so every
+consumer reports the same numbers. A profile's controls are held in a
+ControlBatch: parallel columns (ids, titles, status/severity/section codes,
+impacts) instead of one dict per control. Bulk classification and counting
+of batches lives in ``scoring``.
+"""
+
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Status codes (index into STATUSES)
+PASSED, FAILED, SKIPPED = 0, 1, 2
+STATUSES = ('passed', 'failed', 'skipped')
+
+# Severity codes (index into SEVERITIES) and the lowest impact of each level
+SEVERITIES = ('critical', 'high', 'medium', 'low')
+SEVERITY_THRESHOLDS = (0.9, 0.7, 0.4, float('-inf'))
+
+# InSpec's own default for controls that do not declare an impact
+DEFAULT_IMPACT = 0.5
+
+
+def classify_status(result_count: int, passed_count: int, failed_count: int) -> int:
+    """Passed if every result passed, failed if any failed, skipped otherwise
+    (no results, or only skipped/passed-and-skipped results)"""
+    if not result_count:
+        return SKIPPED
+    if passed_count == result_count:
+        return PASSED
+    if failed_count:
+        return FAILED
+    return SKIPPED
+
+
+def classify_severity(impact: float) -> int:
+    for code, threshold in enumerate(SEVERITY_THRESHOLDS):
+        if impact >= threshold:
+            return code
+    return len(SEVERITIES) - 1
+
+
+def control_section(control_id: str) -> str:
+    """CIS section of a control id (``cis-aws-1.4`` -> ``1``), ``unknown`` if it has none"""
+    parts = control_id.split('-')
+    return parts[2].split('.')[0] if len(parts) > 2 and parts[2] else 'unknown'
+
+
+def normalize_control(control: Dict[str, Any]) -> Tuple[str, str, float, str, int, int, int,
+                                                       Optional[List[Dict[str, Any]]]]:
+    """(id, title, impact, section, result count, passed count, failed count,
+    failures) of a control dict produced by InSpecStreamReader or an adapter
+
+    The one place the defaults are applied: InSpec's default impact, the CIS
+    section from the id unless the adapter names one, and failure details
+    only for failed controls (a failed result can only come with them).
+    """
+    control_id = control.get('id', 'unknown')
+    impact = control.get('impact')
+    failed_count = control.get('failed_count', 0)
+    return (control_id, control.get('title') or '', DEFAULT_IMPACT if impact is None else impact,
+            control.get('section') or control_section(control_id), control.get('result_count', 0),
+            control.get('passed_count', 0), failed_count,
+            (control.get('failures') or None) if failed_count else None)
+
+
+class ControlRecord:
+    """One classified control"""
+
+    __slots__ = ('id', 'title', 'impact', 'status', 'severity', 'section', 'failures')
+
+    def __init__(self, control_id: str, title: str, impact: float, status: int,
+                 severity: int, section: str, failures: Optional[List[Dict[str, Any]]] = None):
+        self.id = control_id
+        self.title = title
+        self.impact = impact
+        self.status = status
+        self.severity = severity
+        self.section = section
+        self.failures = failures or []
+
+    @classmethod
+    def from_inspec(cls, control: Dict[str, Any]) -> 'ControlRecord':
+        """Classify a control dict produced by InSpecStreamReader (or an adapter,
+        which may name the CIS section the control id does not carry)"""
+        control_id, title, impact, section, results, passed, failed, failures = normalize_control(control)
+        status = classify_status(results, passed, failed)
+        return cls(control_id, title, impact, status, classify_severity(impact), section, failures)
+
+    @property
+    def status_name(self) -> str:
+        return STATUSES[self.status]
+
+    @property
+    def severity_name(self) -> str:
+        return SEVERITIES[self.severity]
+
+
+class ControlBatch:
+    """Columnar container for the classified controls of one profile
+
+    Failed-result details are only kept for failed controls.
+    """
+
+    __slots__ = ('profile', 'ids', 'titles', 'impacts', 'statuses', 'severities',
+                 'section_codes', 'sections', '_section_index', 'failures')
+
+    def __init__(self, profile: str = 'unknown'):
+        self.profile = profile
+        self.ids: List[str] = []
+        self.titles: List[str] = []
+        self.impacts = array('d')
+        self.statuses = array('b')
+        self.severities = array('b')
+        self.section_codes = array('H')
+        self.sections: List[str] = []
+        self._section_index: Dict[str, int] = {}
+        # row -> failed results
+        self.failures: Dict[int, List[Dict[str, Any]]] = {}
+
+    def append(self, record: ControlRecord):
+        row = len(self.ids)
+        self.ids.append(record.id)
+        self.titles.append(record.title)
+        self.impacts.append(record.impact)
+        self.statuses.append(record.status)
+        self.severities.append(record.severity)
+        self.section_codes.append(self.section_code(record.section))
+        if record.failures:
+            self.failures[row] = record.failures
+
+    def section_code(self, section: str) -> int:
+        """Code of a section name in this batch, assigning the next one if new"""
+        code = self._section_index.get(section)
+        if code is None:
+            code = self._section_index[section] = len(self.sections)
+            self.sections.append(section)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[ControlRecord]:
+        return (self.record(row) for row in range(len(self.ids)))
+
+    def record(self, row: int) -> ControlRecord:
+        return ControlRecord(self.ids[row], self.titles[row], self.impacts[row], self.statuses[row],
+                             self.severities[row], self.sections[self.section_codes[row]],
+                             self.failures.get(row))
+
+    def rows(self, status: int) -> Iterator[int]:
+        """Row numbers of the controls with the given status"""
+        return (row for row, code in enumerate(self.statuses) if code == status)
+
+    def status_counts(self) -> List[int]:
+        """[passed, failed, skipped]"""
+        counts = [0, 0, 0]
+        for code in self.statuses:
+            counts[code] += 1
+        return counts
+
+    def severity_counts(self, status: int = FAILED) -> Dict[str, int]:
+        """Controls per severity level among those with the given status"""
+        counts = [0] * len(SEVERITIES)
+        for code, severity in zip(self.statuses, self.severities):
+            if code == status:
+                counts[severity] += 1
+        return dict(zip(SEVERITIES, counts))
+
+    def section_counts(self) -> Dict[str, List[int]]:
+        """[passed, failed, skipped] per CIS section"""
+        counts = [[0, 0, 0] for _ in self.sections]
+        for code, section in zip(self.statuses, self.section_codes):
+            counts[section][code] += 1
+        return dict(zip(self.sections, counts))
@@ -0,0 +1,159 @@
+"""
+Fleet-wide rollup of many InSpec reports.
+
+Each report is reduced to a small summary (status counts per profile and CIS
+section plus the ids of its failed controls), usually in a worker process.
+The parent folds those into a FleetSummary whose size depends on the number
+of distinct profiles, sections and controls, not on the number of reports.
+"""
+
+import glob
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .controls import FAILED
+from .adapters import open_report
+from .scoring import build_batch, tally
+
+MAX_ERRORS = 100
+
+
+def iter_report_paths(source: str, suffix: str = '.json') -> Iterator[Tuple[str, str]]:
+    """Yield (path, root) for every report under a directory or matching a glob
+
+    ``root`` is the directory the source refers to, so callers can derive the
+    environment from the part of the path below it.
+    """
+    if os.path.isdir(source):
+        root = source
+        paths = (str(p) for p in sorted(Path(source).rglob(f'*{suffix}')))
+    else:
+        parts = Path(source).parts
+        magic = next((i for i, part in enumerate(parts) if glob.has_magic(part)), len(parts) - 1)
+        root = str(Path(*parts[:magic])) if magic > 0 else '.'
+        paths = iter(sorted(glob.iglob(source, recursive=True)))
+    for path in paths:
+        if os.path.isfile(path):
+            yield path, root
+
+
+def environment_for(path: str, root: str, default: str) -> str:
+    """First directory below root (``reports/staging/acct.json`` -> ``staging``)"""
+    relative = Path(os.path.relpath(path, root)).parts
+    return relative[0] if len(relative) > 1 else default
+
+
+def summarize_report(path: str, environment: str) -> Dict[str, Any]:
+    """Reduce one report to status counts per profile and section"""
+    profiles: Dict[str, List[int]] = {}
+    sections: Dict[str, List[int]] = {}
+    failed: Dict[str, Tuple[str, Any]] = {}
+
+    with open_report(path, keep_failures=False) as reader:
+        for profile, controls in reader.profiles():
+            batch = build_batch(profile.get('name', 'Unknown'), controls)
+            counts = tally(batch)
+            _add_counts(profiles.setdefault(batch.profile, [0, 0, 0]), counts.status)
+            for section, section_counts in counts.sections.items():
+                _add_counts(sections.setdefault(section, [0, 0, 0]), section_counts)
+            for row in batch.rows(FAILED):
+                failed[batch.ids[row]] = (batch.titles[row], batch.impacts[row])
+        has_profiles = reader.has_profiles
+
+    return {
+        'path': path,
+        'environment': environment,
+        'has_profiles': has_profiles,
+        'profiles': profiles,
+        'sections': sections,
+        'failed': failed
+    }
+
+
+class FleetSummary:
+    """Running totals over any number of per-report summaries"""
+
+    def __init__(self):
+        self.reports = 0
+        self.counts = [0, 0, 0]
+        self.profiles: Dict[str, Dict[str, Any]] = {}
+        self.environments: Dict[str, Dict[str, Any]] = {}
+        self.sections: Dict[str, List[int]] = {}
+        # control id -> [title, impact, number of reports failing it]
+        self.failed_controls: Dict[str, List[Any]] = {}
+        self.errors: List[Dict[str, str]] = []
+        self.error_count = 0
+
+    def add(self, report: Dict[str, Any]):
+        if not report['has_profiles']:
+            self.add_error(report['path'], 'not an InSpec report (no profiles)')
+            return
+        self.reports += 1
+        environment = _group(self.environments, report['environment'])
+        environment['reports'] += 1
+        for name, counts in report['profiles'].items():
+            profile = _group(self.profiles, name)
+            profile['reports'] += 1
+            _add_counts(profile['counts'], counts)
+            _add_counts(environment['counts'], counts)
+            _add_counts(self.counts, counts)
+        for section, counts in report['sections'].items():
+            _add_counts(self.sections.setdefault(section, [0, 0, 0]), counts)
+        for control_id, (title, impact) in report['failed'].items():
+            entry = self.failed_controls.setdefault(control_id, [title, impact, 0])
+            entry[2] += 1
+
+    def add_error(self, path: str, error: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'path': path, 'error': error})
+
+    def top_failed(self) -> List[Dict[str, Any]]:
+        """Failed controls, most widespread first"""
+        ranked = sorted(self.failed_controls.items(), key=lambda item: (-item[1][2], item[0]))
+        return [{'id': control_id, 'title': title, 'impact': impact, 'failed_reports': count}
+                for control_id, (title, impact, count) in ranked]
+
+    def to_dict(self, timestamp: str) -> Dict[str, Any]:
+        return {
+            'timestamp': timestamp,
+            'reports': self.reports,
+            **_scores(self.counts),
+            'profiles': {name: {'reports': g['reports'], **_scores(g['counts'])}
+                         for name, g in sorted(self.profiles.items())},
+            'environments': {name: {'reports': g['reports'], **_scores(g['counts'])}
+                             for name, g in sorted(self.environments.items())},
+            'sections': {name: _scores(counts) for name, counts in sorted(self.sections.items(), key=_section_order)},
+            'failed_controls': self.top_failed(),
+            'error_count': self.error_count,
+            'errors': self.errors
+        }
+
+
+def _add_counts(totals: List[int], counts: List[int]):
+    for i, count in enumerate(counts):
+        totals[i] += count
+
+
+def _group(groups: Dict[str, Dict[str, Any]], name: str) -> Dict[str, Any]:
+    group = groups.get(name)
+    if group is None:
+        group = groups[name] = {'reports': 0, 'counts': [0, 0, 0]}
+    return group
+
+
+def _scores(counts: List[int]) -> Dict[str, Any]:
+    passed, failed, skipped = counts
+    total = passed + failed + skipped
+    return {
+        'compliance_score': round(passed / total * 100, 2) if total else 0,
+        'total_controls': total,
+        'passed': passed,
+        'failed': failed,
+        'skipped': skipped
+    }
+
+
+def _section_order(item: Tuple[str, Any]):
+    return (0, int(item[0]), '') if item[0].isdigit() else (1, 0, item[0])
@@ -0,0 +1,324 @@
+"""
+Local history of per-control scan outcomes (SQLite).
+
+Every recorded scan appends one small row per control to ``outcomes``, keyed
+by (control, series, timestamp) where a series is an (environment, profile)
+pair; control ids, titles and series names are stored once in their own
+tables. Per-section status counts of each scan are kept in ``scan_sections``
+so score trends never touch the per-control rows.
+"""
+
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .controls import FAILED, PASSED, STATUSES, ControlBatch
+from .scoring import tally
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    ts INTEGER NOT NULL,
+    environment TEXT NOT NULL,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS scans_environment_ts ON scans (environment, ts);
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    environment TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    UNIQUE (environment, profile)
+);
+CREATE TABLE IF NOT EXISTS controls (
+    id INTEGER PRIMARY KEY,
+    control_id TEXT NOT NULL UNIQUE,
+    title TEXT,
+    section TEXT
+);
+CREATE TABLE IF NOT EXISTS outcomes (
+    control INTEGER NOT NULL,
+    series INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    scan INTEGER NOT NULL,
+    status INTEGER NOT NULL,
+    severity INTEGER NOT NULL,
+    impact REAL,
+    PRIMARY KEY (control, series, ts, scan)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS outcomes_scan ON outcomes (scan, series);
+CREATE TABLE IF NOT EXISTS scan_sections (
+    scan INTEGER NOT NULL,
+    series INTEGER NOT NULL,
+    section TEXT NOT NULL,
+    passed INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    skipped INTEGER NOT NULL,
+    PRIMARY KEY (scan, series, section)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS scan_sections_series ON scan_sections (series, scan);
+"""
+
+
+def to_epoch(timestamp: Any) -> int:
+    """Seconds since the epoch from an ISO-8601 string, datetime or number"""
+    if timestamp is None:
+        return int(time.time())
+    if isinstance(timestamp, (int, float)):
+        return int(timestamp)
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    return int(timestamp.timestamp())
+
+
+def from_epoch(ts: int) -> str:
+    return datetime.fromtimestamp(ts).isoformat()
+
+
+class HistoryStore:
+    """Append-only store of scan outcomes with trend queries"""
+
+    def __init__(self, path: str, readonly: bool = False):
+        self.path = path
+        if readonly:
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+            self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        else:
+            self._db = sqlite3.connect(path)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.executescript(_SCHEMA)
+            self._db.execute("INSERT OR IGNORE INTO meta VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+            self._db.commit()
+        self._control_ids: Dict[str, int] = {}
+        self._series_ids: Dict[Tuple[str, str], int] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    # -- writing ----------------------------------------------------------
+
+    def record_scan(self, batches: Iterable[ControlBatch], timestamp: Any = None,
+                    environment: str = 'production', source: str = '') -> int:
+        """Append one scan (one ControlBatch per profile) and return its scan id"""
+        ts = to_epoch(timestamp)
+        with self._db:
+            scan = self._db.execute('INSERT INTO scans (ts, environment, source) VALUES (?, ?, ?)',
+                                    (ts, environment, source)).lastrowid
+            for batch in batches:
+                series = self._series(environment, batch.profile)
+                controls = [self._control(control_id, title, batch.sections[section])
+                            for control_id, title, section in zip(batch.ids, batch.titles, batch.section_codes)]
+                self._db.executemany(
+                    'INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    zip(controls, [series] * len(controls), [ts] * len(controls), [scan] * len(controls),
+                        batch.statuses, batch.severities, batch.impacts))
+                self._db.executemany(
+                    'INSERT INTO scan_sections VALUES (?, ?, ?, ?, ?, ?)',
+                    ((scan, series, section, *counts) for section, counts in tally(batch).sections.items()))
+        return scan
+
+    def _series(self, environment: str, profile: str) -> int:
+        key = (environment, profile)
+        series = self._series_ids.get(key)
+        if series is None:
+            self._db.execute('INSERT OR IGNORE INTO series (environment, profile) VALUES (?, ?)', key)
+            series = self._db.execute('SELECT id FROM series WHERE environment = ? AND profile = ?',
+                                      key).fetchone()[0]
+            self._series_ids[key] = series
+        return series
+
+    def _control(self, control_id: str, title: str, section: str) -> int:
+        control = self._control_ids.get(control_id)
+        if control is None:
+            row = self._db.execute('SELECT id, title FROM controls WHERE control_id = ?', (control_id,)).fetchone()
+            if row is None:
+                control = self._db.execute('INSERT INTO controls (control_id, title, section) VALUES (?, ?, ?)',
+                                           (control_id, title, section)).lastrowid
+            else:
+                control = row[0]
+                if row[1] != title:
+                    self._db.execute('UPDATE controls SET title = ? WHERE id = ?', (title, control))
+            self._control_ids[control_id] = control
+        return control
+
+    # -- reading ----------------------------------------------------------
+
+    def latest_scans(self, environment: Optional[str] = None) -> List[Tuple[int, int, str, str]]:
+        """(scan id, ts, environment, profile) of the newest scan of every series"""
+        sql = """
+            SELECT s.id, s.ts, r.environment, r.profile
+            FROM series r
+            JOIN scans s ON s.id = (
+                SELECT ss.scan FROM scan_sections ss JOIN scans x ON x.id = ss.scan
+                WHERE ss.series = r.id ORDER BY x.ts DESC, x.id DESC LIMIT 1)
+        """
+        params: Tuple = ()
+        if environment is not None:
+            sql += ' WHERE r.environment = ?'
+            params = (environment,)
+        return self._db.execute(sql + ' ORDER BY r.environment, r.profile', params).fetchall()
+
+    def scan_source(self, scan: int) -> str:
+        """Report path a scan was recorded from ('' if unknown)"""
+        row = self._db.execute('SELECT source FROM scans WHERE id = ?', (scan,)).fetchone()
+        return (row[0] or '') if row else ''
+
+    def load_batch(self, scan: int, environment: str, profile: str) -> ControlBatch:
+        """Rebuild the ControlBatch of one profile in a recorded scan (without failure messages)"""
+        batch = ControlBatch(profile)
+        rows = self._db.execute("""
+            SELECT c.control_id, c.title, c.section, o.status, o.severity, o.impact
+            FROM outcomes o
+            JOIN series r ON r.id = o.series
+            JOIN controls c ON c.id = o.control
+            WHERE o.scan = ? AND r.environment = ? AND r.profile = ?
+            ORDER BY o.control
+        """, (scan, environment, profile))
+        for control_id, title, section, status, severity, impact in rows:
+            batch.ids.append(control_id)
+            batch.titles.append(title or '')
+            batch.section_codes.append(batch.section_code(section))
+            batch.statuses.append(status)
+            batch.severities.append(severity)
+            batch.impacts.append(impact)
+        return batch
+
+    def score_trend(self, days: Optional[int] = None, environment: Optional[str] = None,
+                    profile: Optional[str] = None, section: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Compliance score of every scan, per series (and per section when one is given)"""
+        where, params = self._filters(days, environment, profile)
+        if section is not None:
+            where.append('ss.section = ?')
+            params.append(section)
+        rows = self._db.execute(f"""
+            SELECT s.ts, r.environment, r.profile, SUM(ss.passed), SUM(ss.failed), SUM(ss.skipped)
+            FROM scan_sections ss
+            JOIN scans s ON s.id = ss.scan
+            JOIN series r ON r.id = ss.series
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            GROUP BY ss.scan, ss.series
+            ORDER BY s.ts, r.environment, r.profile
+        """, params)
+        return [{'timestamp': from_epoch(ts), 'environment': env, 'profile': name,
+                 'passed': passed, 'failed': failed, 'skipped': skipped,
+                 'compliance_score': _score(passed, failed, skipped)}
+                for ts, env, name, passed, failed, skipped in rows]
+
+    def first_failure(self, control_id: str, environment: Optional[str] = None,
+                      profile: Optional[str] = None) -> List[Dict[str, Any]]:
+        """When a control started failing, per series
+
+        ``failing_since`` is the start of the current failure streak (None if
+        the control is not failing now), ``first_failed`` the first failure
+        ever recorded.
+        """
+        where, params = self._filters(None, environment, profile)
+        where.insert(0, 'c.control_id = ?')
+        params.insert(0, control_id)
+        rows = self._db.execute(f"""
+            SELECT r.environment, r.profile, o.ts, o.status
+            FROM outcomes o
+            JOIN controls c ON c.id = o.control
+            JOIN series r ON r.id = o.series
+            WHERE {' AND '.join(where)}
+            ORDER BY r.environment, r.profile, o.ts
+        """, params)
+        found: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for env, name, ts, status in rows:
+            entry = found.setdefault((env, name), {'environment': env, 'profile': name, 'status': None,
+                                                   'failing_since': None, 'first_failed': None,
+                                                   'last_passed': None, 'scans': 0})
+            entry['scans'] += 1
+            if status == FAILED:
+                if entry['first_failed'] is None:
+                    entry['first_failed'] = ts
+                if entry['status'] != FAILED:
+                    entry['failing_since'] = ts
+            else:
+                entry['failing_since'] = None
+                if status == PASSED:
+                    entry['last_passed'] = ts
+            entry['status'] = status
+        results = []
+        for entry in found.values():
+            entry['status'] = STATUSES[entry['status']]
+            for key in ('failing_since', 'first_failed', 'last_passed'):
+                if entry[key] is not None:
+                    entry[key] = from_epoch(entry[key])
+            results.append(entry)
+        return results
+
+    def mttr(self, days: Optional[int] = None, environment: Optional[str] = None,
+             profile: Optional[str] = None) -> Dict[str, Any]:
+        """Mean time to remediate over the failed -> passed episodes inside the window
+
+        Skipped outcomes neither open nor close an episode. Only status
+        transitions are read back from SQLite (LAG over the primary key
+        order), so the scan stays cheap with millions of rows.
+        """
+        where, params = self._filters(days, environment, profile, table='o')
+        rows = self._db.execute(f"""
+            SELECT control_id, environment, profile, ts, status FROM (
+                SELECT o.control, o.series, o.ts, o.status,
+                       LAG(o.status) OVER (PARTITION BY o.control, o.series ORDER BY o.ts) AS previous
+                FROM outcomes o
+                JOIN series r ON r.id = o.series
+                {'WHERE ' + ' AND '.join(where) if where else ''}
+            ) t
+            JOIN controls c ON c.id = t.control
+            JOIN series r ON r.id = t.series
+            WHERE previous IS NULL OR previous != status
+            ORDER BY t.control, t.series, t.ts
+        """, params)
+        durations: List[int] = []
+        per_control: Dict[str, List[int]] = {}
+        open_since: Dict[Tuple[str, str, str], int] = {}
+        for control_id, env, name, ts, status in rows:
+            key = (control_id, env, name)
+            if status == FAILED:
+                open_since.setdefault(key, ts)
+            elif status == PASSED and key in open_since:
+                duration = ts - open_since.pop(key)
+                durations.append(duration)
+                per_control.setdefault(control_id, []).append(duration)
+        slowest = sorted(((sum(d) / len(d), control_id, len(d)) for control_id, d in per_control.items()),
+                         reverse=True)
+        return {
+            'remediations': len(durations),
+            'mttr_seconds': sum(durations) / len(durations) if durations else None,
+            'open_failures': len(open_since),
+            'slowest_controls': [{'control_id': control_id, 'remediations': count, 'mttr_seconds': mean}
+                                 for mean, control_id, count in slowest[:10]]
+        }
+
+    def _filters(self, days: Optional[int], environment: Optional[str], profile: Optional[str],
+                 table: str = 's') -> Tuple[List[str], List[Any]]:
+        where: List[str] = []
+        params: List[Any] = []
+        if days is not None:
+            where.append(f'{table}.ts >= ?')
+            params.append(int(time.time()) - days * 86400)
+        if environment is not None:
+            where.append('r.environment = ?')
+            params.append(environment)
+        if profile is not None:
+            where.append('r.profile = ?')
+            params.append(profile)
+        return where, params
+
+
+def _score(passed: int, failed: int, skipped: int) -> float:
+    total = passed + failed + skipped
+    return round(passed / total * 100, 2) if total else 0
@@ -0,0 +1,253 @@
+"""
+Streaming reader for InSpec JSON reports.
+
+Walks the report incrementally and yields one compact record per control, so
+the per-resource ``results`` arrays never have to be held in memory at once.
+"""
+
+import json
+import re
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+CHUNK_SIZE = 1 << 16
+
+# Control fields kept verbatim; everything else is decoded and dropped
+CONTROL_FIELDS = ('id', 'title', 'impact')
+FAILURE_FIELDS = ('message', 'code_desc')
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+_DECODER = json.JSONDecoder()
+_SCALARS = (str, int, float, bool, type(None))
+
+
+class InSpecStreamReader:
+    """Incremental reader for a single InSpec JSON report.
+
+    Top-level members other than ``profiles`` (``platform``, ``statistics``,
+    ``version``...) are collected into ``metadata``. Each control is reduced to
+    its id/title/impact plus result counts and, optionally, the failed-result
+    messages. ``bytes_read`` and ``read_seconds`` tell how much of the file
+    has been read so far and how long the reads took.
+
+    Readers for other tools' reports (see ``adapters``) subclass this one and
+    normalize their checks into the same control records: they name the
+    top-level member holding the checks in STREAM_KEY and walk it in
+    ``_stream``.
+    """
+
+    FORMAT = 'inspec'
+    STREAM_KEY = 'profiles'
+    # Top-level members that identify a report of this format
+    SIGNATURE_KEYS = ('profiles', 'platform', 'statistics')
+
+    def __init__(self, path: str, keep_failures: bool = True, chunk_size: int = CHUNK_SIZE):
+        self.path = path
+        self.keep_failures = keep_failures
+        self.metadata: Dict[str, Any] = {}
+        self.has_profiles = False
+        self.bytes_read = 0
+        self.read_seconds = 0.0
+        self._file = open(path, 'r', encoding='utf-8')
+        self._chunk_size = chunk_size
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._top = None
+        self._state = 'start'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    # -- public API -------------------------------------------------------
+
+    def header(self) -> Dict[str, Any]:
+        """Read top-level members up to ``profiles`` (or the whole document)"""
+        if self._state == 'start':
+            self._top = self._members()
+            for key in self._top:
+                if key == self.STREAM_KEY:
+                    self.has_profiles = True
+                    self._state = 'profiles'
+                    return self.metadata
+                self.metadata[key] = self._value()
+            self._finish()
+        return self.metadata
+
+    def profiles(self) -> Iterator[Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]]:
+        """Yield ``(profile, controls)`` pairs; ``controls`` is a lazy iterator.
+
+        ``profile`` holds the profile's scalar members. Members that follow
+        ``controls`` in the file are filled in once the controls are consumed.
+        """
+        self.header()
+        if self._state != 'profiles':
+            return
+        self._state = 'reading'
+        yield from self._stream()
+        for key in self._top:
+            self.metadata[key] = self._value()
+        self._finish()
+
+    def controls(self) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Yield flat ``(profile, control)`` records"""
+        for profile, controls in self.profiles():
+            for control in controls:
+                yield profile, control
+
+    # -- document structure ----------------------------------------------
+
+    def _stream(self):
+        if self._peek() == '[':
+            for _ in self._items():
+                yield from self._profile()
+        else:
+            self._value()
+
+    def _profile(self):
+        profile: Dict[str, Any] = {}
+        has_controls = False
+        for key in self._members():
+            if key == 'controls':
+                has_controls = True
+                controls = self._controls()
+                yield profile, controls
+                for _ in controls:  # drain whatever the caller left unread
+                    pass
+            else:
+                value = self._value()
+                if isinstance(value, _SCALARS):
+                    profile[key] = value
+        if not has_controls:
+            yield profile, iter(())
+
+    def _controls(self) -> Iterator[Dict[str, Any]]:
+        if self._peek() != '[':
+            self._value()
+            return
+        for _ in self._items():
+            yield self._control()
+
+    def _control(self) -> Dict[str, Any]:
+        control: Dict[str, Any] = {}
+        for key in self._members():
+            if key == 'results' and self._peek() == '[':
+                total = passed = failed = 0
+                failures = []
+                for _ in self._items():
+                    result = self._value()
+                    total += 1
+                    status = result.get('status') if isinstance(result, dict) else None
+                    if status == 'passed':
+                        passed += 1
+                    elif status == 'failed':
+                        failed += 1
+                        if self.keep_failures:
+                            failures.append({k: result[k] for k in FAILURE_FIELDS if k in result})
+                control['result_count'] = total
+                control['passed_count'] = passed
+                control['failed_count'] = failed
+                if self.keep_failures:
+                    control['failures'] = failures
+            elif key in CONTROL_FIELDS:
+                control[key] = self._value()
+            else:
+                self._value()
+        return control
+
+    def _finish(self):
+        self._state = 'done'
+        if self._peek() != '':
+            raise self._error('Extra data')
+        self.close()
+
+    # -- tokenizer --------------------------------------------------------
+
+    def _fill(self, size: Optional[int] = None) -> bool:
+        if self._eof:
+            return False
+        start = time.perf_counter()
+        data = self._file.read(size or self._chunk_size)
+        self.read_seconds += time.perf_counter() - start
+        self.bytes_read = self._file.buffer.tell()
+        if not data:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Return the next non-whitespace character without consuming it"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, char: str):
+        if self._peek() != char:
+            raise self._error(f"Expecting '{char}'")
+        self._pos += 1
+
+    def _error(self, msg: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(f"{msg} in {self.path}", self._buf, self._pos)
+
+    def _value(self) -> Any:
+        """Decode the next complete JSON value"""
+        self._peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                # Value spans the buffer boundary; grow geometrically
+                if not self._fill(max(self._chunk_size, len(self._buf) - self._pos)):
+                    raise
+                continue
+            # A number cut at the buffer edge ("1." / "0.5" of "0.52") decodes
+            # short; re-read whenever only number characters remain buffered
+            if _NUMBER_TAIL.match(self._buf, end).end() < len(self._buf) or not self._fill():
+                self._pos = end
+                return value
+
+    def _members(self) -> Iterator[str]:
+        """Yield each key of the object at the cursor, leaving the cursor on its value"""
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            if not isinstance(key, str):
+                raise self._error('Expecting property name')
+            self._expect(':')
+            yield key
+            char = self._peek()
+            if char not in (',', '}'):
+                raise self._error("Expecting ',' delimiter")
+            self._pos += 1
+            if char == '}':
+                return
+
+    def _items(self) -> Iterator[None]:
+        """Yield once per element of the array at the cursor"""
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield
+            char = self._peek()
+            if char not in (',', ']'):
+                raise self._error("Expecting ',' delimiter")
+            self._pos += 1
+            if char == ']':
+                return
@@ -0,0 +1,351 @@
+"""
+On-disk cache of parsed reports, keyed by content hash.
+
+A report's compact aggregated form (its ControlBatches plus the tool summary
+and parse stats) is written once to ``<digest>.bin`` and memory-mapped back
+on later lookups, so an unchanged report is never decoded twice: not after a
+restart, not when CI rewrites it with identical content, not by the next
+tool that reads it.
+
+Entry layout (little-endian header, native-endian columns, every section
+8-byte aligned)::
+
+    magic (8s) | version (I) | meta length (I) | meta JSON | columns...
+
+The meta JSON lists each profile's name, sections, row count and the
+(offset, length) of its columns: impacts (d), statuses (b), severities (b),
+section codes (H), then ids and titles as one UTF-8 blob each plus the
+character offset where every string ends (I). Failed-result details, when
+the parser kept them, are stored in the meta.
+
+Entries are evicted least recently used first (by file mtime, refreshed on
+every hit) once the directory exceeds ``max_bytes``. Path -> digest lookups
+are memoized by file signature in ``index.json``, so a report that has not
+changed on disk is not even re-hashed. Temporary files left behind by a
+writer that crashed mid-write are removed when the cache is opened.
+
+Several processes may share one directory (the exporter and the report
+generator): every file is written to its own temporary file and renamed
+into place. Sharing only helps one way, though: the exporter stores
+entries without failed-result details, which the generator needs
+(``get(..., need_failures=True)``), so the generator re-parses those
+reports, while the exporter can reuse the generator's entries.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Tuple
+
+from .controls import ControlBatch
+
+MAGIC = b'CISRPC01'
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+MAX_INDEXED_PATHS = 10000
+ENTRY_SUFFIX = '.bin'
+TMP_SUFFIX = '.tmp'
+# Temporary files older than this are leftovers of a crashed writer
+STALE_TMP_SECONDS = 3600
+
+_HEADER = struct.Struct('<8sII')
+_ALIGN = 8
+_COLUMNS = (('impacts', 'd'), ('statuses', 'b'), ('severities', 'b'), ('section_codes', 'H'))
+
+
+class CachedReport:
+    """A report read back from the cache"""
+
+    __slots__ = ('digest', 'batches', 'tool', 'stats', 'has_failures')
+
+    def __init__(self, digest: str, batches: List[ControlBatch], tool: Dict[str, Any],
+                 stats: Dict[str, Any], has_failures: bool):
+        self.digest = digest
+        self.batches = batches
+        self.tool = tool
+        self.stats = stats
+        self.has_failures = has_failures
+
+
+class ReportCache:
+    """Directory of cached reports, capped at max_bytes"""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._remove_stale_tmp()
+        self._index_path = os.path.join(directory, 'index.json')
+        # path -> [size, mtime_ns, ctime_ns, inode, digest]
+        self._paths: Dict[str, List[Any]] = self._load_index()
+        self._dirty = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.save_index()
+
+    # -- lookups ----------------------------------------------------------
+
+    def digest(self, path: str) -> str:
+        """Content hash of a report, re-hashed only when its file signature changed"""
+        signature = _signature(path)
+        known = self._paths.get(path)
+        if known is not None and known[:4] == signature:
+            return known[4]
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        self._remember(path, signature, digest.hexdigest())
+        return self._paths[path][4]
+
+    def known_digest(self, path: str) -> Optional[str]:
+        """Digest looked up for path earlier, if the file has not changed since"""
+        known = self._paths.get(path)
+        try:
+            return known[4] if known is not None and known[:4] == _signature(path) else None
+        except OSError:
+            return None
+
+    def get(self, digest: str, need_failures: bool = False) -> Optional[CachedReport]:
+        """Cached form of a report, or None (also when failures are needed but were not kept)"""
+        entry = self._entry_path(digest)
+        try:
+            report = _read_entry(entry, digest)
+        except (OSError, ValueError, KeyError, struct.error):
+            report = None
+        if report is None or (need_failures and not report.has_failures):
+            return None
+        try:
+            os.utime(entry)  # most recently used
+        except OSError:
+            pass
+        return report
+
+    def put(self, digest: str, batches: List[ControlBatch], tool: Optional[Dict[str, Any]] = None,
+            stats: Optional[Dict[str, Any]] = None, has_failures: bool = False,
+            path: Optional[str] = None):
+        """Store a parsed report; with path, only if the file still matches what was hashed"""
+        if path is not None:
+            known = self._paths.get(path)
+            try:
+                if known is None or known[4] != digest or known[:4] != _signature(path):
+                    return
+            except OSError:
+                return
+        entry = self._entry_path(digest)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=TMP_SUFFIX)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                _write_entry(f, batches, tool or {}, stats or {}, has_failures)
+            os.replace(tmp, entry)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.evict(keep=entry)
+
+    # -- size cap ---------------------------------------------------------
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Remove least recently used entries until the cache fits max_bytes, returns how many"""
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        removed = 0
+        for _, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def _entries(self) -> List[Tuple[int, str, int]]:
+        """(mtime_ns, path, size) of every entry"""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if item.name.endswith(ENTRY_SUFFIX):
+                    try:
+                        st = item.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime_ns, item.path, st.st_size))
+        return entries
+
+    def _remove_stale_tmp(self):
+        cutoff = time.time() - STALE_TMP_SECONDS
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if not item.name.endswith(TMP_SUFFIX):
+                    continue
+                try:
+                    if item.stat().st_mtime < cutoff:
+                        os.unlink(item.path)
+                except FileNotFoundError:
+                    continue
+
+    def _entry_path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest + ENTRY_SUFFIX)
+
+    # -- path index -------------------------------------------------------
+
+    def _remember(self, path: str, signature: List[int], digest: str):
+        self._paths.pop(path, None)
+        self._paths[path] = signature + [digest]
+        while len(self._paths) > MAX_INDEXED_PATHS:
+            del self._paths[next(iter(self._paths))]
+        self._dirty = True
+
+    def _load_index(self) -> Dict[str, List[Any]]:
+        try:
+            with open(self._index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if index.get('version') != CACHE_VERSION:
+            return {}
+        return index.get('paths', {})
+
+    def save_index(self):
+        """Persist the path -> digest memo (cheap no-op when nothing changed)"""
+        if not self._dirty:
+            return
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=TMP_SUFFIX)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': CACHE_VERSION, 'paths': self._paths}, f, separators=(',', ':'))
+            os.replace(tmp, self._index_path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._dirty = False
+
+
+def _signature(path: str) -> List[int]:
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino]
+
+
+# -- entry format ---------------------------------------------------------
+
+def _write_entry(f, batches: List[ControlBatch], tool: Dict[str, Any], stats: Dict[str, Any],
+                 has_failures: bool):
+    blobs: List[bytes] = []
+    offset = 0
+    profiles = []
+
+    def add(data: bytes) -> List[int]:
+        nonlocal offset
+        position = offset
+        blobs.append(data)
+        padding = -len(data) % _ALIGN
+        if padding:
+            blobs.append(b'\0' * padding)
+        offset += len(data) + padding
+        return [position, len(data)]
+
+    for batch in batches:
+        columns = {name: add(getattr(batch, name).tobytes()) for name, _ in _COLUMNS}
+        for name, strings in (('ids', batch.ids), ('titles', batch.titles)):
+            columns[name] = add(''.join(strings).encode('utf-8'))
+            columns[name + '_ends'] = add(array('I', accumulate(map(len, strings))).tobytes())
+        profiles.append({
+            'name': batch.profile,
+            'rows': len(batch),
+            'sections': batch.sections,
+            'columns': columns,
+            'failures': {str(row): failures for row, failures in batch.failures.items()}
+        })
+
+    meta = json.dumps({
+        'byteorder': sys.byteorder,
+        'created': time.time(),
+        'has_failures': has_failures,
+        'tool': _encode_tool(tool),
+        'stats': stats,
+        'profiles': profiles
+    }, separators=(',', ':'), default=str).encode('utf-8')
+    meta += b' ' * (-(_HEADER.size + len(meta)) % _ALIGN)
+
+    f.write(_HEADER.pack(MAGIC, CACHE_VERSION, len(meta)))
+    f.write(meta)
+    for blob in blobs:
+        f.write(blob)
+
+
+def _read_entry(path: str, digest: str) -> Optional[CachedReport]:
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, meta_length = _HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or version != CACHE_VERSION:
+                return None
+            meta = json.loads(mm[_HEADER.size:_HEADER.size + meta_length])
+            base = _HEADER.size + meta_length
+            swap = meta['byteorder'] != sys.byteorder
+            view = memoryview(mm)
+            try:
+                batches = [_read_batch(view, base, profile, swap) for profile in meta['profiles']]
+            finally:
+                view.release()
+    return CachedReport(digest, batches, _decode_tool(meta['tool']), meta['stats'], meta['has_failures'])
+
+
+def _read_batch(view: memoryview, base: int, profile: Dict[str, Any], swap: bool) -> ControlBatch:
+    batch = ControlBatch(profile['name'])
+    columns = profile['columns']
+
+    def column(name: str, typecode: str) -> array:
+        start, length = columns[name]
+        values = array(typecode)
+        values.frombytes(view[base + start:base + start + length])
+        if swap:
+            values.byteswap()
+        return values
+
+    for name, typecode in _COLUMNS:
+        setattr(batch, name, column(name, typecode))
+    for name in ('ids', 'titles'):
+        start, length = columns[name]
+        text = str(view[base + start:base + start + length], 'utf-8')
+        ends = column(name + '_ends', 'I')
+        setattr(batch, name, [text[a:b] for a, b in zip([0, *ends], ends)])
+    for section in profile['sections']:
+        batch.section_code(section)
+    batch.failures = {int(row): failures for row, failures in profile['failures'].items()}
+    if len(batch.ids) != profile['rows'] or len(batch.statuses) != profile['rows']:
+        raise ValueError('truncated cache entry')
+    return batch
+
+
+def _encode_tool(tool: Dict[str, Any]) -> Dict[str, Any]:
+    # (policy, action, status) keys are not JSON object keys
+    encoded = dict(tool)
+    if 'remediations' in encoded:
+        encoded['remediations'] = [[*key, count] for key, count in encoded['remediations'].items()]
+    return encoded
+
+
+def _decode_tool(tool: Dict[str, Any]) -> Dict[str, Any]:
+    decoded = dict(tool)
+    if 'remediations' in decoded:
+        decoded['remediations'] = {tuple(item[:3]): item[3] for item in decoded['remediations']}
+    if 'remediation_latencies' in decoded:
+        decoded['remediation_latencies'] = [tuple(item) for item in decoded['remediation_latencies']]
+    return decoded
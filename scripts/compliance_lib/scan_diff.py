@@ -0,0 +1,135 @@
+"""
+Scan-over-scan diff of control outcomes.
+
+The previous run is summarized by a compact fingerprint index that maps
+``profile|control_id`` to a status code plus a short content hash. A new scan
+is compared against it in a single pass while the next index is built.
+Fingerprints are taken straight from ControlBatch columns; only controls
+that differ from the previous run are turned into records.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from .controls import FAILED, STATUSES, ControlBatch
+
+STATUS_CODES = {'passed': 'P', 'failed': 'F', 'skipped': 'S'}
+# Index letter per status code (PASSED, FAILED, SKIPPED)
+_STATUS_LETTERS = tuple(STATUS_CODES[name] for name in STATUSES)
+INDEX_VERSION = 2
+
+
+def control_key(profile: str, control_id: str) -> str:
+    return f"{profile}|{control_id}"
+
+
+def fingerprint(status: int, title: str, impact: float, failures: Optional[List[Dict[str, Any]]]) -> str:
+    """Status letter followed by a 16-hex-digit hash of the control's reported content
+    (failure details only count for failed controls)"""
+    digest = hashlib.blake2b(f"{title}\x1f{impact!r}".encode(), digest_size=8)
+    if failures:
+        digest.update(json.dumps(failures, sort_keys=True, default=str).encode())
+    return _STATUS_LETTERS[status] + digest.hexdigest()
+
+
+def load_index(path: str) -> Optional[Dict[str, Any]]:
+    """Load a fingerprint index written by save_index, or None if there is none"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        index = json.load(f)
+    if index.get('version') != INDEX_VERSION:
+        return None
+    return index
+
+
+def save_index(path: str, controls: Dict[str, str], timestamp: str):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump({'version': INDEX_VERSION, 'timestamp': timestamp, 'controls': controls},
+                  f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+class ScanDiff:
+    """Classifies each control of a scan against the previous fingerprint index"""
+
+    def __init__(self, previous: Optional[Dict[str, Any]] = None):
+        self.baseline = previous is None
+        self.previous_timestamp = previous.get('timestamp') if previous else None
+        self._previous: Dict[str, str] = previous.get('controls', {}) if previous else {}
+        self.index: Dict[str, str] = {}
+        self.newly_failed: List[Dict[str, Any]] = []
+        self.newly_fixed: List[Dict[str, Any]] = []
+        self.changed: List[Dict[str, Any]] = []
+        self.added: List[Dict[str, Any]] = []
+        self.unchanged = 0
+
+    def observe_batch(self, batch: ControlBatch):
+        """Record every control of a batch"""
+        previous, index, profile = self._previous, self.index, batch.profile
+        unchanged = 0
+        for row, (control_id, title, impact, status) in enumerate(
+                zip(batch.ids, batch.titles, batch.impacts, batch.statuses)):
+            failures = batch.failures.get(row) if status == FAILED else None
+            key = control_key(profile, control_id)
+            entry = index[key] = fingerprint(status, title, impact, failures)
+            before = previous.get(key)
+            if before == entry:
+                unchanged += 1
+            else:
+                self._classify(profile, control_id, title, impact, STATUSES[status], failures or [], before)
+        self.unchanged += unchanged
+
+    def _classify(self, profile: str, control_id: str, title: str, impact: float, status: str,
+                  failures: List[Dict[str, Any]], before: Optional[str]) -> str:
+        """File a control that differs from the previous run, returns its category"""
+        record = {'profile': profile, 'id': control_id, 'title': title, 'status': status}
+        if before is None:
+            category, bucket = 'added', self.added
+        elif status == 'failed' and before[0] != 'F':
+            category, bucket = 'newly_failed', self.newly_failed
+        elif status == 'passed' and before[0] == 'F':
+            category, bucket = 'newly_fixed', self.newly_fixed
+        else:
+            category, bucket = 'changed', self.changed
+            record['previous_status'] = _status_name(before[0])
+
+        if status == 'failed':
+            record['impact'] = impact
+            record['failures'] = failures
+            # A control that appears failing after a baseline exists is a new failure too
+            if category == 'added' and not self.baseline:
+                self.newly_failed.append(record)
+        bucket.append(record)
+        return category
+
+    def removed(self) -> List[str]:
+        """Keys present in the previous scan but not in this one"""
+        return sorted(key for key in self._previous if key not in self.index)
+
+    def to_dict(self, timestamp: str) -> Dict[str, Any]:
+        return {
+            'timestamp': timestamp,
+            'previous_timestamp': self.previous_timestamp,
+            'baseline': self.baseline,
+            'newly_failed': _without_failures(self.newly_failed),
+            'newly_fixed': _without_failures(self.newly_fixed),
+            'changed': _without_failures(self.changed),
+            'added': _without_failures(self.added),
+            'removed': self.removed(),
+            'unchanged': self.unchanged
+        }
+
+
+def _without_failures(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{k: v for k, v in record.items() if k != 'failures'} for record in records]
+
+
+def _status_name(code: str) -> str:
+    for name, value in STATUS_CODES.items():
+        if value == code:
+            return name
+    return 'unknown'
@@ -0,0 +1,178 @@
+"""
+Bulk classification and aggregation of control batches.
+
+A profile's raw control columns (result counts and impacts) are collected
+first and classified in one go, then counted per status, severity and CIS
+section. The pure-Python engine loops over the columns; the optional NumPy
+engine does the same with array comparisons and bincount grouping. Both give
+identical results, so callers never need to know which one ran.
+
+The engine is picked per batch: ``auto`` (default, overridable with the
+COMPLIANCE_SCORING_ENGINE environment variable) uses NumPy when it is
+installed and the batch has at least NUMPY_MIN_CONTROLS controls, where the
+array setup cost pays off.
+"""
+
+import os
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .controls import (FAILED, PASSED, SEVERITIES, SEVERITY_THRESHOLDS, SKIPPED, ControlBatch,
+                       classify_severity, classify_status, normalize_control)
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+ENGINES = ('auto', 'python', 'numpy')
+DEFAULT_ENGINE = os.getenv('COMPLIANCE_SCORING_ENGINE', 'auto')
+NUMPY_MIN_CONTROLS = 2048
+
+
+class Tally:
+    """Control counts of a batch: [passed, failed, skipped] overall and per
+    section, and failed controls per severity"""
+
+    __slots__ = ('status', 'severity', 'sections')
+
+    def __init__(self, status: List[int], severity: Dict[str, int], sections: Dict[str, List[int]]):
+        self.status = status
+        self.severity = severity
+        self.sections = sections
+
+    @property
+    def total(self) -> int:
+        return sum(self.status)
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, Tally) and self.status == other.status
+                and self.severity == other.severity and self.sections == other.sections)
+
+    def __repr__(self) -> str:
+        return f"Tally(status={self.status}, severity={self.severity}, sections={self.sections})"
+
+
+def resolve_engine(engine: Optional[str], size: int) -> str:
+    """Concrete engine ('python' or 'numpy') for a batch of the given size"""
+    engine = engine or DEFAULT_ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown scoring engine: {engine}")
+    if engine == 'numpy' and np is None:
+        raise RuntimeError("The numpy scoring engine needs numpy installed")
+    if engine == 'auto':
+        return 'numpy' if np is not None and size >= NUMPY_MIN_CONTROLS else 'python'
+    return engine
+
+
+def build_batch(profile: str, controls: Iterable[Dict[str, Any]], engine: Optional[str] = None,
+                timings: Optional[Dict[str, float]] = None) -> ControlBatch:
+    """Collect a profile's streamed controls into a ControlBatch and classify them in bulk
+
+    With a timings dict, the bulk classification time is added to its
+    ``classify`` entry (collecting is dominated by reading the stream).
+    """
+    batch = ControlBatch(profile)
+    result_counts = array('q')
+    passed_counts = array('q')
+    failed_counts = array('q')
+
+    for control in controls:
+        control_id, title, impact, section, results, passed, failed, failures = normalize_control(control)
+        if failures:
+            batch.failures[len(batch.ids)] = failures
+        batch.ids.append(control_id)
+        batch.titles.append(title)
+        batch.impacts.append(impact)
+        batch.section_codes.append(batch.section_code(section))
+        result_counts.append(results)
+        passed_counts.append(passed)
+        failed_counts.append(failed)
+
+    start = time.perf_counter()
+    if resolve_engine(engine, len(batch)) == 'numpy':
+        statuses, severities = _classify_numpy(result_counts, passed_counts, failed_counts, batch.impacts)
+    else:
+        statuses, severities = _classify_python(result_counts, passed_counts, failed_counts, batch.impacts)
+    batch.statuses = statuses
+    batch.severities = severities
+    if timings is not None:
+        timings['classify'] = timings.get('classify', 0.0) + time.perf_counter() - start
+    return batch
+
+
+def tally(batch: ControlBatch, engine: Optional[str] = None) -> Tally:
+    """Count a batch's controls per status, section and (failed) severity"""
+    if resolve_engine(engine, len(batch)) == 'numpy':
+        return _tally_numpy(batch)
+    return Tally(batch.status_counts(), batch.severity_counts(FAILED), batch.section_counts())
+
+
+def merge(tallies: Iterable[Tally]) -> Tally:
+    """Sum several tallies (e.g. every profile of a report)"""
+    status = [0, 0, 0]
+    severity = dict.fromkeys(SEVERITIES, 0)
+    sections: Dict[str, List[int]] = {}
+    for part in tallies:
+        for i, count in enumerate(part.status):
+            status[i] += count
+        for name, count in part.severity.items():
+            severity[name] += count
+        for name, counts in part.sections.items():
+            totals = sections.setdefault(name, [0, 0, 0])
+            for i, count in enumerate(counts):
+                totals[i] += count
+    return Tally(status, severity, sections)
+
+
+def transitions(previous: Optional[ControlBatch], batch: ControlBatch) -> Tuple[Dict[str, int], int]:
+    """Controls of batch failing that did not fail in previous (per severity),
+    and how many failed in previous but no longer fail; nothing without previous"""
+    newly_failing = dict.fromkeys(SEVERITIES, 0)
+    if previous is None:
+        return newly_failing, 0
+    failed_before = {previous.ids[row] for row in previous.rows(FAILED)}
+    failing = set()
+    for row in batch.rows(FAILED):
+        control_id = batch.ids[row]
+        failing.add(control_id)
+        if control_id not in failed_before:
+            newly_failing[SEVERITIES[batch.severities[row]]] += 1
+    return newly_failing, len(failed_before - failing)
+
+
+# -- engines --------------------------------------------------------------
+
+def _classify_python(result_counts, passed_counts, failed_counts, impacts) -> Tuple[array, array]:
+    statuses = array('b', map(classify_status, result_counts, passed_counts, failed_counts))
+    severities = array('b', map(classify_severity, impacts))
+    return statuses, severities
+
+
+def _classify_numpy(result_counts, passed_counts, failed_counts, impacts) -> Tuple[array, array]:
+    results = np.frombuffer(result_counts, dtype=np.int64)
+    passed = np.frombuffer(passed_counts, dtype=np.int64)
+    failed = np.frombuffer(failed_counts, dtype=np.int64)
+    statuses = np.full(len(results), SKIPPED, dtype=np.int8)
+    statuses[(results != 0) & (failed != 0)] = FAILED
+    statuses[(results != 0) & (passed == results)] = PASSED
+
+    # One step down per threshold not reached; NaN reaches none, like classify_severity
+    values = np.frombuffer(impacts, dtype=np.float64)
+    severities = np.zeros(len(values), dtype=np.int8)
+    for threshold in SEVERITY_THRESHOLDS[:-1]:
+        severities += ~(values >= threshold)
+    return array('b', statuses.tobytes()), array('b', severities.tobytes())
+
+
+def _tally_numpy(batch: ControlBatch) -> Tally:
+    statuses = np.frombuffer(batch.statuses, dtype=np.int8).astype(np.intp)
+    severities = np.frombuffer(batch.severities, dtype=np.int8)
+    sections = np.frombuffer(batch.section_codes, dtype=np.uint16).astype(np.intp)
+
+    status = np.bincount(statuses, minlength=3)
+    severity = np.bincount(severities[statuses == FAILED], minlength=len(SEVERITIES))
+    by_section = np.bincount(sections * 3 + statuses, minlength=3 * len(batch.sections)).reshape(-1, 3)
+    return Tally(status.tolist(), dict(zip(SEVERITIES, severity.tolist())),
+                 dict(zip(batch.sections, by_section.tolist())))
@@ -0,0 +1,101 @@
+"""
+Tenant (environment and account) of a report, from its path or metadata.
+
+One exporter can serve many environments and accounts when reports are laid
+out by tenant. The layout is a pattern matched against the report's path
+relative to the watched directory::
+
+    {environment}/{account}/*.json
+    {environment}/{account}-{region}/{profile}.json
+    **/{account}.json
+
+``{name}`` matches (part of) one path component, ``*`` anything within a
+component and ``**/`` any number of directories. ``environment``,
+``account`` and ``profile`` are used (``profile`` only names profiles the
+report leaves unnamed); other fields just have to match. Whatever the path
+does not give is taken from the report itself: top-level ``environment`` /
+``account`` / ``account_id`` members, also looked up in ``platform``.
+"""
+
+import os
+import re
+from typing import Any, Dict, NamedTuple, Optional
+
+TENANT_FIELDS = ('environment', 'account', 'profile')
+# Report members that name the tenant, in order of preference
+METADATA_KEYS = {
+    'environment': ('environment', 'env'),
+    'account': ('account', 'account_id', 'subscription_id', 'project_id')
+}
+_TOKENS = re.compile(r'(\{\w+\}|\*\*/?|\*)')
+
+
+class Tenant(NamedTuple):
+    environment: str
+    account: str = ''
+    # Name for profiles the report does not name ('' = leave as is)
+    profile: str = ''
+
+
+class TenantResolver:
+    """Resolve report paths below root to tenants using a path pattern (optional)"""
+
+    def __init__(self, pattern: Optional[str] = None, root: str = '.'):
+        self.pattern = pattern or None
+        self.root = root
+        self._regex = compile_pattern(pattern) if pattern else None
+
+    def match(self, path: str) -> Dict[str, str]:
+        """Tenant fields the pattern takes from path ({} when it does not match)"""
+        if self._regex is None:
+            return {}
+        relative = os.path.relpath(path, self.root).replace(os.sep, '/')
+        found = self._regex.fullmatch(relative)
+        if found is None:
+            return {}
+        return {field: value for field, value in found.groupdict().items() if field in TENANT_FIELDS}
+
+    def resolve(self, path: str, hints: Optional[Dict[str, str]] = None,
+                environment: str = 'production') -> Tenant:
+        """Tenant of a report: path first, then report metadata hints, then the defaults"""
+        values = self.match(path) if path else {}
+        for field, value in (hints or {}).items():
+            values.setdefault(field, value)
+        return Tenant(values.get('environment') or environment, values.get('account', ''),
+                      values.get('profile', ''))
+
+
+def compile_pattern(pattern: str) -> 're.Pattern[str]':
+    """Regex for a tenant path pattern (see module docstring)"""
+    regex = []
+    for token in _TOKENS.split(pattern.strip('/')):
+        if token == '**/':
+            regex.append(r'(?:[^/]+/)*')
+        elif token == '**':
+            regex.append(r'.*')
+        elif token == '*':
+            regex.append(r'[^/]*')
+        elif token.startswith('{') and token.endswith('}'):
+            regex.append(f'(?P<{token[1:-1]}>[^/]+?)')
+        else:
+            regex.append(re.escape(token))
+    try:
+        return re.compile(''.join(regex))
+    except re.error as e:
+        raise ValueError(f"Invalid tenant path pattern {pattern!r}: {e}") from None
+
+
+def tenant_hints(metadata: Dict[str, Any]) -> Dict[str, str]:
+    """Environment / account named by a report's top-level members (picklable)"""
+    sources = [metadata]
+    if isinstance(metadata.get('platform'), dict):
+        sources.append(metadata['platform'])
+    hints = {}
+    for field, keys in METADATA_KEYS.items():
+        for source in sources:
+            value = next((source[key] for key in keys
+                          if isinstance(source.get(key), (str, int)) and source[key] != ''), None)
+            if value is not None:
+                hints[field] = str(value)
+                break
+    return hints
@@ -0,0 +1,325 @@
+"""
+Incremental directory watcher for report files.
+
+Uses Linux inotify (through ctypes, no extra dependency) and falls back to
+polling elsewhere. Files are tracked by (inode, mtime, size) rather than by
+name, so a report overwritten in place is picked up again, and a file is only
+handed out once it has stopped changing for ``settle_time`` seconds. With
+``recursive`` the whole tree is watched (one inotify watch per directory) and
+files are tracked by their path relative to the watched directory.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+               IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+_GONE_MASK = IN_DELETE | IN_MOVED_FROM
+_EVENT = struct.Struct('iIII')
+
+Signature = Tuple[int, int, int]
+
+
+class _Inotify:
+    """Minimal non-blocking inotify handle for a directory and, optionally, subdirectories"""
+
+    def __init__(self, directory: str):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.root = directory
+        self._dirs: Dict[int, str] = {}  # watch descriptor -> directory relative to root
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        try:
+            self.add('')
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def add(self, relative: str):
+        """Watch a directory given relative to root"""
+        path = os.path.join(self.root, relative) if relative else self.root
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f'inotify_add_watch failed for {path}')
+        self._dirs[wd] = relative
+
+    def read(self, timeout: Optional[float]) -> List[Tuple[int, str]]:
+        """Wait up to timeout seconds and return (mask, path relative to root) events
+
+        Events about a watched directory itself carry that directory's path
+        ('' for root).
+        """
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            directory = self._dirs.pop(wd, None) if mask & IN_IGNORED else self._dirs.get(wd)
+            if directory is None:
+                if mask & IN_Q_OVERFLOW:
+                    events.append((mask, ''))
+                continue
+            events.append((mask, os.path.join(directory, name) if name else directory))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ReportWatcher:
+    """Reports changed, fully written files in a directory.
+
+    ``mode`` is ``auto`` (inotify when available, else polling), ``inotify``
+    or ``poll``. At most ``max_tracked`` file signatures are kept; older
+    entries are evicted and replaced by a ctime watermark, so evicted files
+    are not re-processed by a polling rescan unless they change.
+    ``ignore_before`` maps paths to epoch seconds: a listed file whose ctime
+    is before its time is treated as already processed. With ``recursive``,
+    files in subdirectories are reported too.
+    """
+
+    def __init__(self, directory: str, suffix: str = '.json', mode: str = 'auto',
+                 poll_interval: float = 10.0, settle_time: float = 2.0,
+                 max_tracked: int = 10000, ignore_before: Optional[Dict[str, float]] = None,
+                 recursive: bool = False):
+        if mode not in ('auto', 'inotify', 'poll'):
+            raise ValueError(f"Unknown watch mode: {mode}")
+        self.directory = directory
+        self.suffix = suffix
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.max_tracked = max_tracked
+        self.recursive = recursive
+        self._tracked: 'OrderedDict[str, Tuple[Signature, int]]' = OrderedDict()
+        self._pending: Dict[str, float] = {}
+        self._horizon_ns = 0
+        root = os.path.realpath(directory)
+        # relative name -> ctime (ns) below which the file counts as processed
+        self._processed_ns = {os.path.relpath(os.path.realpath(path), root): int(ts * 1e9)
+                              for path, ts in (ignore_before or {}).items()}
+        self._inotify: Optional[_Inotify] = None
+        self._next_scan = 0.0
+
+    @property
+    def backend(self) -> str:
+        return 'inotify' if self._inotify else 'poll'
+
+    @property
+    def pending(self) -> int:
+        """Changed files still waiting to settle"""
+        return len(self._pending)
+
+    def close(self):
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+    def poll(self, timeout: Optional[float] = None) -> List[str]:
+        """Wait for changes (at most timeout seconds) and return paths ready to process"""
+        if self._inotify is None and self.mode != 'poll':
+            self._start_inotify()
+
+        if self._inotify:
+            self._read_events(self._wait_time(timeout))
+        else:
+            wait = max(0.0, self._next_scan - time.monotonic())
+            wait = self._wait_time(wait if timeout is None else min(wait, timeout))
+            if wait:
+                time.sleep(wait)
+            if time.monotonic() >= self._next_scan:
+                self._scan()
+                self._next_scan = time.monotonic() + self.poll_interval
+
+        return self._settle()
+
+    # -- change detection -------------------------------------------------
+
+    def _start_inotify(self):
+        if not os.path.isdir(self.directory):
+            return
+        try:
+            self._inotify = _Inotify(self.directory)
+            if self.recursive:
+                for relative in self._subdirectories(''):
+                    self._inotify.add(relative)
+        except (OSError, AttributeError) as e:
+            self.close()
+            if self.mode == 'inotify':
+                raise
+            # Not Linux, or out of inotify watches: keep polling
+            self.mode = 'poll'
+            print(f"⚠️ inotify unavailable ({e}), falling back to polling")
+            return
+        # Pick up whatever is already there (or arrived while we were not watching)
+        self._scan()
+
+    def _read_events(self, timeout: Optional[float]):
+        for mask, name in self._inotify.read(timeout):
+            if mask & (IN_Q_OVERFLOW | IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                if mask & IN_Q_OVERFLOW:
+                    self._scan()
+                    continue
+                if name:
+                    continue  # a subdirectory; its parent reports it gone
+                # Directory itself went away; re-establish the watch on next poll
+                self.close()
+                return
+            if mask & IN_ISDIR:
+                if self.recursive:
+                    self._directory_event(mask, name)
+                continue
+            if not name.endswith(self.suffix):
+                continue
+            if mask & _GONE_MASK:
+                self._pending.pop(name, None)
+                self._tracked.pop(name, None)
+            else:
+                self._pending.setdefault(name, 0.0)
+
+    def _directory_event(self, mask: int, relative: str):
+        if mask & _GONE_MASK:
+            prefix = relative + os.sep
+            for table in (self._pending, self._tracked):
+                for name in [n for n in table if n.startswith(prefix)]:
+                    del table[name]
+            return
+        try:
+            for subdirectory in [relative, *self._subdirectories(relative)]:
+                self._inotify.add(subdirectory)
+        except OSError as e:
+            print(f"⚠️ Cannot watch {os.path.join(self.directory, relative)} ({e}), rescanning")
+        # Files may have landed before the watch was in place
+        self._scan()
+
+    def _subdirectories(self, relative: str) -> List[str]:
+        """Every directory below relative (relative to the watched directory)"""
+        found = []
+        stack = [relative]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(os.path.join(self.directory, current)) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(os.path.join(current, entry.name))
+                            found.append(stack[-1])
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+        return found
+
+    def _listing(self):
+        """(relative name, DirEntry) of every report file, in subdirectories too if recursive"""
+        stack = ['']
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(os.path.join(self.directory, current)) as entries:
+                    for entry in entries:
+                        name = os.path.join(current, entry.name) if current else entry.name
+                        try:
+                            if self.recursive and entry.is_dir(follow_symlinks=False):
+                                stack.append(name)
+                            elif entry.name.endswith(self.suffix) and entry.is_file():
+                                yield name, entry
+                        except FileNotFoundError:
+                            continue
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+
+    def _scan(self):
+        """Full directory listing (polling mode and inotify resync)"""
+        if not os.path.isdir(self.directory):
+            return
+        present = set()
+        for name, entry in self._listing():
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            present.add(name)
+            known = self._tracked.get(name)
+            if known is not None:
+                if known[0] != _signature(st):
+                    self._pending.setdefault(name, 0.0)
+            elif st.st_ctime_ns > max(self._horizon_ns, self._processed_ns.get(name, 0)):
+                self._pending.setdefault(name, 0.0)
+        for name in [n for n in self._tracked if n not in present]:
+            del self._tracked[name]
+
+    def _settle(self) -> List[str]:
+        """Hand out pending files that changed and have been quiet for settle_time"""
+        settled = []
+        now = time.time()
+        for name in list(self._pending):
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                del self._pending[name]
+                self._tracked.pop(name, None)
+                continue
+            signature = _signature(st)
+            known = self._tracked.get(name)
+            if known is not None and known[0] == signature:
+                del self._pending[name]
+                continue
+            if now - st.st_mtime < self.settle_time:
+                self._pending[name] = st.st_mtime  # still being written
+                continue
+            del self._pending[name]
+            settled.append((st.st_ctime_ns, name, signature))
+        # Oldest first, which also keeps the tracked table ordered by ctime for eviction
+        settled.sort()
+        for ctime_ns, name, signature in settled:
+            self._remember(name, signature, ctime_ns)
+        return [os.path.join(self.directory, name) for _, name, _ in settled]
+
+    def _remember(self, name: str, signature: Signature, ctime_ns: int):
+        self._tracked[name] = (signature, ctime_ns)
+        self._tracked.move_to_end(name)
+        while len(self._tracked) > self.max_tracked:
+            _, (_, evicted_ctime) = self._tracked.popitem(last=False)
+            self._horizon_ns = max(self._horizon_ns, evicted_ctime)
+
+    def _wait_time(self, timeout: Optional[float]) -> Optional[float]:
+        """Shorten the wait so pending files are re-checked once they should have settled"""
+        if not self._pending:
+            return timeout
+        now = time.time()
+        due = min((mtime + self.settle_time) - now for mtime in self._pending.values())
+        due = max(0.0, min(due, self.settle_time))
+        return due if timeout is None else min(due, timeout)
+
+
+def _signature(st: os.stat_result) -> Signature:
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
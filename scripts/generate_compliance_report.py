@@ -2,15 +2,33 @@
 """
 CIS Benchmark Compliance Report Generator
 
-This script aggregates InSpec JSON results and generates a compliance score
-and detailed report for CIS Benchmark compliance.
+This script aggregates InSpec JSON results (or Checkov / Cloud Custodian
+reports) and generates a compliance score and detailed report for CIS
+Benchmark compliance.
 """
 
+import argparse
+import glob
+import io
 import json
-import sys
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Iterable, List, Any, Optional, TextIO, Tuple
+
+from compliance_lib import InSpecStreamReader, open_report
+from compliance_lib.adapters import tool_summary
+from compliance_lib.controls import FAILED, PASSED, SKIPPED, ControlBatch
+from compliance_lib.fleet import FleetSummary, environment_for, iter_report_paths, summarize_report
+from compliance_lib.history import HistoryStore, from_epoch
+from compliance_lib.report_cache import CachedReport, ReportCache
+from compliance_lib.scoring import build_batch, merge, tally
+from compliance_lib.scan_diff import ScanDiff, load_index, save_index
+
+INDEX_FILENAME = 'compliance_index.json'
+# Reports are written piecewise; a large buffer keeps that to a few syscalls
+WRITE_BUFFER_SIZE = 1 << 16
 
 
 class ComplianceReportGenerator:
@@ -18,53 +36,58 @@ class ComplianceReportGenerator:
         self.inspec_json_path = Path(inspec_json_path)
         self.report_data = None
         
-    def load_inspec_results(self) -> Dict[str, Any]:
-        """Load InSpec JSON results"""
-        with open(self.inspec_json_path, 'r') as f:
-            return json.load(f)
-    
-    def calculate_compliance_score(self, results: Dict[str, Any]) -> Dict[str, Any]:
-        """Calculate compliance score from InSpec results"""
-        profiles = results.get('profiles', [])
-        
-        total_controls = 0
-        passed_controls = 0
-        failed_controls = 0
-        skipped_controls = 0
-        
-        control_details = []
-        
-        for profile in profiles:
-            for control in profile.get('controls', []):
-                total_controls += 1
-                control_id = control.get('id', 'unknown')
-                control_title = control.get('title', 'No title')
-                control_impact = control.get('impact', 0.0)
-                
-                results_list = control.get('results', [])
-                
-                # Determine control status
-                if not results_list:
-                    skipped_controls += 1
-                    status = 'skipped'
-                elif all(r.get('status') == 'passed' for r in results_list):
-                    passed_controls += 1
-                    status = 'passed'
-                elif any(r.get('status') == 'failed' for r in results_list):
-                    failed_controls += 1
-                    status = 'failed'
-                else:
-                    skipped_controls += 1
-                    status = 'skipped'
-                
-                control_details.append({
-                    'id': control_id,
-                    'title': control_title,
-                    'impact': control_impact,
-                    'status': status,
-                    'results': results_list
-                })
+    def load_inspec_results(self) -> InSpecStreamReader:
+        """Open InSpec JSON results (or a Checkov / Custodian report) for streaming"""
+        return open_report(str(self.inspec_json_path))
+    
+    def calculate_compliance_score(self, results: InSpecStreamReader,
+                                   diff: Optional[ScanDiff] = None) -> Dict[str, Any]:
+        """Calculate compliance score from streamed InSpec results
+        
+        Each profile's controls are classified in bulk into a ControlBatch; only
+        failed controls keep their result details. When a ScanDiff is given,
+        every control is also classified against the previous run.
+        """
+        first_profile = None
+        batches = []
+        
+        for profile, controls in results.profiles():
+            if first_profile is None:
+                first_profile = profile
+            batches.append(build_batch(profile.get('name', 'Unknown'), controls))
         
+        profile_name = first_profile.get('name', 'Unknown') if first_profile is not None else 'Unknown'
+        return self._score_batches(batches, profile_name, datetime.now().isoformat(), diff)
+    
+    def calculate_from_history(self, store: HistoryStore, environment: str = 'production',
+                               diff: Optional[ScanDiff] = None) -> Dict[str, Any]:
+        """Calculate compliance score from the latest recorded scan of each profile
+        
+        Failure messages are not kept in the history, so failed controls are
+        listed without them.
+        """
+        latest = store.latest_scans(environment)
+        if not latest:
+            raise ValueError(f"No scans recorded for environment {environment} in {store.path}")
+        batches = [store.load_batch(scan, env, profile) for scan, _, env, profile in latest]
+        return self._score_batches(batches, batches[0].profile,
+                                   from_epoch(max(ts for _, ts, _, _ in latest)), diff)
+    
+    def calculate_from_cache(self, cached: CachedReport,
+                             diff: Optional[ScanDiff] = None) -> Dict[str, Any]:
+        """Calculate compliance score from a cached parse of the same report"""
+        profile_name = cached.batches[0].profile if cached.batches else 'Unknown'
+        return self._score_batches(cached.batches, profile_name, datetime.now().isoformat(), diff)
+    
+    def _score_batches(self, batches: List[ControlBatch], profile_name: str, timestamp: str,
+                       diff: Optional[ScanDiff] = None) -> Dict[str, Any]:
+        if diff is not None:
+            for batch in batches:
+                diff.observe_batch(batch)
+        
+        counts = merge(tally(batch) for batch in batches).status
+        passed_controls, failed_controls, skipped_controls = counts
+        total_controls = sum(counts)
         compliance_percentage = (passed_controls / total_controls * 100) if total_controls > 0 else 0
         
         return {
@@ -73,14 +96,21 @@ class ComplianceReportGenerator:
             'failed_controls': failed_controls,
             'skipped_controls': skipped_controls,
             'compliance_percentage': round(compliance_percentage, 2),
-            'control_details': control_details,
-            'scan_timestamp': datetime.now().isoformat(),
-            'profile_name': profiles[0].get('name', 'Unknown') if profiles else 'Unknown'
+            'controls': batches,
+            'scan_timestamp': timestamp,
+            'profile_name': profile_name
         }
     
     def generate_markdown_report(self, compliance_data: Dict[str, Any]) -> str:
         """Generate markdown compliance report"""
-        report = f"""# CIS Benchmark Compliance Report
+        out = io.StringIO()
+        self.write_markdown_report(compliance_data, out)
+        return out.getvalue()
+    
+    def write_markdown_report(self, compliance_data: Dict[str, Any], out: TextIO):
+        """Write the markdown compliance report to a text stream"""
+        write = out.write
+        write(f"""# CIS Benchmark Compliance Report
 
 **Generated:** {compliance_data['scan_timestamp']}  
 **Profile:** {compliance_data['profile_name']}
@@ -97,53 +127,38 @@ class ComplianceReportGenerator:
 
 ## Compliance Status
 
-"""
+""")
         
         # Add status indicator
         if compliance_data['compliance_percentage'] >= 90:
-            report += "🟢 **Status: COMPLIANT** (≥90%)\n\n"
+            write("🟢 **Status: COMPLIANT** (≥90%)\n\n")
         elif compliance_data['compliance_percentage'] >= 70:
-            report += "🟡 **Status: PARTIALLY COMPLIANT** (70-89%)\n\n"
+            write("🟡 **Status: PARTIALLY COMPLIANT** (70-89%)\n\n")
         else:
-            report += "🔴 **Status: NON-COMPLIANT** (<70%)\n\n"
+            write("🔴 **Status: NON-COMPLIANT** (<70%)\n\n")
+        
+        batches = compliance_data['controls']
         
         # Failed controls
-        failed_controls = [c for c in compliance_data['control_details'] if c['status'] == 'failed']
-        if failed_controls:
-            report += "## ❌ Failed Controls (Requires Attention)\n\n"
-            for control in failed_controls:
-                report += f"### {control['id']}: {control['title']}\n"
-                report += f"**Impact:** {control['impact']}\n\n"
-                
-                for result in control['results']:
-                    if result.get('status') == 'failed':
-                        report += f"- **Message:** {result.get('message', 'No message')}\n"
-                        if 'code_desc' in result:
-                            report += f"- **Check:** `{result['code_desc']}`\n"
-                
-                report += "\n"
+        if compliance_data['failed_controls']:
+            write("## ❌ Failed Controls (Requires Attention)\n\n")
+            _write_failed_controls(write, ((batch.ids[row], batch.titles[row], batch.impacts[row],
+                                            batch.failures.get(row, [])) for batch in batches
+                                           for row in batch.rows(FAILED)))
         
         # Passed controls summary
-        passed_controls = [c for c in compliance_data['control_details'] if c['status'] == 'passed']
-        if passed_controls:
-            report += f"## ✅ Passed Controls ({len(passed_controls)})\n\n"
-            report += "| Control ID | Title |\n"
-            report += "|------------|-------|\n"
-            for control in passed_controls:
-                report += f"| {control['id']} | {control['title']} |\n"
-            report += "\n"
+        if compliance_data['passed_controls']:
+            write(f"## ✅ Passed Controls ({compliance_data['passed_controls']})\n\n")
+            _write_control_table(write, ((batch.ids[row], batch.titles[row]) for batch in batches
+                                         for row in batch.rows(PASSED)))
         
         # Skipped controls
-        skipped_controls = [c for c in compliance_data['control_details'] if c['status'] == 'skipped']
-        if skipped_controls:
-            report += f"## ⚠️ Skipped Controls ({len(skipped_controls)})\n\n"
-            report += "| Control ID | Title |\n"
-            report += "|------------|-------|\n"
-            for control in skipped_controls:
-                report += f"| {control['id']} | {control['title']} |\n"
-            report += "\n"
+        if compliance_data['skipped_controls']:
+            write(f"## ⚠️ Skipped Controls ({compliance_data['skipped_controls']})\n\n")
+            _write_control_table(write, ((batch.ids[row], batch.titles[row]) for batch in batches
+                                         for row in batch.rows(SKIPPED)))
         
-        report += """## Recommendations
+        write("""## Recommendations
 
 1. **Address Failed Controls:** Prioritize remediation of failed controls based on impact level.
 2. **Review Skipped Controls:** Investigate why controls were skipped and enable them if applicable.
@@ -158,9 +173,7 @@ class ComplianceReportGenerator:
 
 ---
 *This report was generated automatically by the Compliance-as-Code framework.*
-"""
-        
-        return report
+""")
     
     def generate_json_summary(self, compliance_data: Dict[str, Any]) -> str:
         """Generate JSON summary for programmatic consumption"""
@@ -172,33 +185,138 @@ class ComplianceReportGenerator:
             'skipped': compliance_data['skipped_controls'],
             'timestamp': compliance_data['scan_timestamp'],
             'profile': compliance_data['profile_name'],
-            'failed_control_ids': [c['id'] for c in compliance_data['control_details'] if c['status'] == 'failed']
+            'failed_control_ids': [batch.ids[row] for batch in compliance_data['controls']
+                                   for row in batch.rows(FAILED)]
         }
         return json.dumps(summary, indent=2)
     
-    def run(self, output_dir: str = 'reports'):
-        """Run the report generation"""
-        print("Loading InSpec results...")
-        results = self.load_inspec_results()
+    def generate_delta_report(self, compliance_data: Dict[str, Any], diff: ScanDiff) -> str:
+        """Generate markdown report of what changed since the previous run"""
+        out = io.StringIO()
+        self.write_delta_report(compliance_data, diff, out)
+        return out.getvalue()
+    
+    def write_delta_report(self, compliance_data: Dict[str, Any], diff: ScanDiff, out: TextIO):
+        """Write the markdown delta report to a text stream"""
+        write = out.write
+        removed = diff.removed()
+        write(f"""# CIS Benchmark Compliance Delta Report
+
+**Generated:** {compliance_data['scan_timestamp']}  
+**Compared to:** {diff.previous_timestamp or 'no previous run (baseline)'}  
+**Profile:** {compliance_data['profile_name']}
+
+| Change | Controls |
+|--------|----------|
+| **Compliance Score** | **{compliance_data['compliance_percentage']}%** |
+| ❌ Newly Failed | {len(diff.newly_failed)} |
+| ✅ Newly Fixed | {len(diff.newly_fixed)} |
+| 🔄 Changed | {len(diff.changed)} |
+| ➕ Added | {len(diff.added)} |
+| ➖ Removed | {len(removed)} |
+| Unchanged | {diff.unchanged} |
+
+""")
         
-        print("Calculating compliance score...")
-        compliance_data = self.calculate_compliance_score(results)
+        if diff.newly_failed:
+            write("## ❌ Newly Failed Controls\n\n")
+            _write_failed_controls(write, ((c['id'], c['title'], c['impact'], c['failures'])
+                                           for c in diff.newly_failed))
         
-        print(f"\nCompliance Score: {compliance_data['compliance_percentage']}%")
-        print(f"Passed: {compliance_data['passed_controls']}/{compliance_data['total_controls']}")
-        print(f"Failed: {compliance_data['failed_controls']}")
+        if diff.newly_fixed:
+            write(f"## ✅ Newly Fixed Controls ({len(diff.newly_fixed)})\n\n")
+            _write_control_table(write, [(c['id'], c['title']) for c in diff.newly_fixed])
+        
+        if diff.changed:
+            write(f"## 🔄 Changed Controls ({len(diff.changed)})\n\n")
+            write("| Control ID | Title | Before | Now |\n")
+            write("|------------|-------|--------|-----|\n")
+            for control in diff.changed:
+                write(f"| {control['id']} | {control['title']} | {control['previous_status']} | {control['status']} |\n")
+            write("\n")
         
+        if removed:
+            write(f"## ➖ Removed Controls ({len(removed)})\n\n")
+            for key in removed:
+                write(f"- {key.split('|', 1)[-1]}\n")
+            write("\n")
+        
+        write("---\n*This report was generated automatically by the Compliance-as-Code framework.*\n")
+    
+    def run(self, output_dir: str = 'reports', incremental: bool = False,
+            history: Optional[str] = None, from_history: Optional[str] = None,
+            environment: str = 'production', cache: Optional[str] = None, index: bool = False):
+        """Run the report generation
+        
+        In incremental mode only the delta report/JSON and the summary are
+        written; the full markdown report is left as it was. Incremental runs
+        (and full runs with index) compare against and then update the
+        fingerprint index; other runs skip the diff entirely. With history the
+        scan is also appended to that history database; with from_history the
+        latest recorded scan is reported instead of parsing the InSpec JSON.
+        With cache (a report cache directory) a report parsed before is not
+        parsed again.
+        """
         # Create output directory
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
+        index_path = output_path / INDEX_FILENAME
+        diff = ScanDiff(load_index(str(index_path))) if incremental or index else None
+        
+        if from_history:
+            print(f"Loading latest scans from {from_history}...")
+            with HistoryStore(from_history, readonly=True) as store:
+                compliance_data = self.calculate_from_history(store, environment, diff)
+        else:
+            report_cache = (ReportCache(cache, int(float(os.getenv('REPORT_CACHE_MAX_MB', 256)) * 1024 * 1024))
+                            if cache else None)
+            path = str(self.inspec_json_path)
+            digest = report_cache.digest(path) if report_cache else None
+            cached = report_cache.get(digest, need_failures=True) if report_cache else None
+            if cached:
+                print(f"Using cached results of {path} from {cache}")
+                compliance_data = self.calculate_from_cache(cached, diff)
+            else:
+                print("Loading InSpec results...")
+                with self.load_inspec_results() as results:
+                    print("Calculating compliance score...")
+                    compliance_data = self.calculate_compliance_score(results, diff)
+                    tool = tool_summary(results)
+                if report_cache:
+                    report_cache.put(digest, compliance_data['controls'], tool, has_failures=True, path=path)
+            if report_cache:
+                report_cache.close()
         
-        # Generate markdown report
-        print("\nGenerating markdown report...")
-        markdown_report = self.generate_markdown_report(compliance_data)
-        markdown_path = output_path / 'compliance_report.md'
-        with open(markdown_path, 'w') as f:
-            f.write(markdown_report)
-        print(f"Markdown report saved to: {markdown_path}")
+        if history:
+            with HistoryStore(history) as store:
+                scan = store.record_scan(compliance_data['controls'], compliance_data['scan_timestamp'],
+                                         environment, source=str(self.inspec_json_path))
+            print(f"Scan recorded in {history} (scan {scan})")
+        
+        print(f"\nCompliance Score: {compliance_data['compliance_percentage']}%")
+        print(f"Passed: {compliance_data['passed_controls']}/{compliance_data['total_controls']}")
+        print(f"Failed: {compliance_data['failed_controls']}")
+        if diff is not None:
+            print(f"Newly failed: {len(diff.newly_failed)}, newly fixed: {len(diff.newly_fixed)}, "
+                  f"unchanged: {diff.unchanged}")
+        
+        if incremental:
+            # Generate delta report
+            print("\nGenerating delta report...")
+            delta_path = output_path / 'compliance_delta.md'
+            with open(delta_path, 'w', buffering=WRITE_BUFFER_SIZE) as f:
+                self.write_delta_report(compliance_data, diff, f)
+            delta_json_path = output_path / 'compliance_delta.json'
+            with open(delta_json_path, 'w') as f:
+                json.dump(diff.to_dict(compliance_data['scan_timestamp']), f, indent=2)
+            print(f"Delta report saved to: {delta_path} and {delta_json_path}")
+        else:
+            # Generate markdown report
+            print("\nGenerating markdown report...")
+            markdown_path = output_path / 'compliance_report.md'
+            with open(markdown_path, 'w', buffering=WRITE_BUFFER_SIZE) as f:
+                self.write_markdown_report(compliance_data, f)
+            print(f"Markdown report saved to: {markdown_path}")
         
         # Generate JSON summary
         print("Generating JSON summary...")
@@ -208,20 +326,208 @@ class ComplianceReportGenerator:
             f.write(json_summary)
         print(f"JSON summary saved to: {json_path}")
         
+        # Fingerprint index the next run is compared against
+        if diff is not None:
+            save_index(str(index_path), diff.index, compliance_data['scan_timestamp'])
+        
         return compliance_data
 
 
+def run_fleet(source: str, output_dir: str = 'reports', workers: Optional[int] = None,
+              environment: str = 'production') -> Dict[str, Any]:
+    """Roll up every report under a directory (or matching a glob) into one summary
+    
+    Reports are summarized in a process pool with at most two per worker in
+    flight, and each summary is folded into the fleet totals as soon as it
+    arrives, so memory does not grow with the number of reports.
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    output_root = output_path.resolve()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    fleet = FleetSummary()
+    
+    def jobs():
+        for path, root in iter_report_paths(source):
+            if Path(path).resolve().parent == output_root:
+                continue  # our own output from a previous run
+            yield path, environment_for(path, root, environment)
+    
+    def collect(path, future):
+        try:
+            fleet.add(future.result())
+        except (ValueError, OSError) as e:
+            fleet.add_error(path, str(e))
+    
+    print(f"Summarizing reports from {source} ({workers or 'no'} worker processes)...")
+    if workers <= 0:
+        for path, env in jobs():
+            try:
+                fleet.add(summarize_report(path, env))
+            except (ValueError, OSError) as e:
+                fleet.add_error(path, str(e))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = {}
+            for path, env in jobs():
+                in_flight[pool.submit(summarize_report, path, env)] = path
+                if len(in_flight) >= workers * 2:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(in_flight.pop(future), future)
+            for future in list(in_flight):
+                collect(in_flight.pop(future), future)
+    
+    summary = fleet.to_dict(datetime.now().isoformat())
+    print(f"\nFleet Compliance Score: {summary['compliance_score']}% across {summary['reports']} reports")
+    print(f"Passed: {summary['passed']}/{summary['total_controls']}")
+    print(f"Failed: {summary['failed']}")
+    if summary['error_count']:
+        print(f"⚠️ {summary['error_count']} files could not be summarized")
+    
+    markdown_path = output_path / 'fleet_report.md'
+    with open(markdown_path, 'w', buffering=WRITE_BUFFER_SIZE) as f:
+        write_fleet_report(summary, f)
+    print(f"Fleet report saved to: {markdown_path}")
+    
+    json_path = output_path / 'fleet_summary.json'
+    with open(json_path, 'w', buffering=WRITE_BUFFER_SIZE) as f:
+        json.dump(summary, f, indent=2)
+    print(f"Fleet summary saved to: {json_path}")
+    
+    return summary
+
+
+def write_fleet_report(summary: Dict[str, Any], out: TextIO):
+    """Write the markdown fleet rollup to a text stream"""
+    write = out.write
+    write(f"""# CIS Benchmark Fleet Compliance Report
+
+**Generated:** {summary['timestamp']}  
+**Reports:** {summary['reports']}
+
+## Executive Summary
+
+| Metric | Value |
+|--------|-------|
+| **Compliance Score** | **{summary['compliance_score']}%** |
+| Total Controls | {summary['total_controls']} |
+| ✅ Passed | {summary['passed']} |
+| ❌ Failed | {summary['failed']} |
+| ⚠️ Skipped | {summary['skipped']} |
+
+""")
+    
+    for heading, label, groups in (('By Environment', 'Environment', summary['environments']),
+                                   ('By Profile', 'Profile', summary['profiles'])):
+        write(f"## {heading}\n\n")
+        write(f"| {label} | Reports | Score | ✅ Passed | ❌ Failed | ⚠️ Skipped |\n")
+        write("|---|---|---|---|---|---|\n")
+        for name, group in groups.items():
+            write(f"| {name} | {group['reports']} | {group['compliance_score']}% | "
+                  f"{group['passed']} | {group['failed']} | {group['skipped']} |\n")
+        write("\n")
+    
+    write("## By CIS Section\n\n")
+    write("| Section | Score | ✅ Passed | ❌ Failed | ⚠️ Skipped |\n")
+    write("|---|---|---|---|---|\n")
+    for name, group in summary['sections'].items():
+        write(f"| {name} | {group['compliance_score']}% | "
+              f"{group['passed']} | {group['failed']} | {group['skipped']} |\n")
+    write("\n")
+    
+    if summary['failed_controls']:
+        write(f"## ❌ Failed Controls ({len(summary['failed_controls'])})\n\n")
+        write("| Control ID | Title | Impact | Failing Reports |\n")
+        write("|------------|-------|--------|-----------------|\n")
+        for control in summary['failed_controls']:
+            write(f"| {control['id']} | {control['title']} | {control['impact']} | {control['failed_reports']} |\n")
+        write("\n")
+    
+    if summary['errors']:
+        write(f"## ⚠️ Unreadable Reports ({summary['error_count']})\n\n")
+        for error in summary['errors']:
+            write(f"- `{error['path']}`: {error['error']}\n")
+        write("\n")
+    
+    write("---\n*This report was generated automatically by the Compliance-as-Code framework.*\n")
+
+
+def _write_failed_controls(write, controls: Iterable[Tuple[str, str, float, List[Dict[str, Any]]]]):
+    for control_id, title, impact, failures in controls:
+        write(f"### {control_id}: {title}\n")
+        write(f"**Impact:** {impact}\n\n")
+        for result in failures:
+            write(f"- **Message:** {result.get('message', 'No message')}\n")
+            if 'code_desc' in result:
+                write(f"- **Check:** `{result['code_desc']}`\n")
+        write("\n")
+
+
+def _write_control_table(write, controls: Iterable[Tuple[str, str]]):
+    write("| Control ID | Title |\n")
+    write("|------------|-------|\n")
+    for control_id, title in controls:
+        write(f"| {control_id} | {title} |\n")
+    write("\n")
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python generate_compliance_report.py <inspec_json_file> [output_dir]")
-        print("Example: python generate_compliance_report.py reports/aws-cis-report.json reports")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description='Generate CIS compliance reports from InSpec JSON results',
+        epilog='Example: python generate_compliance_report.py reports/aws-cis-report.json reports')
+    parser.add_argument('inspec_json_file', nargs='?',
+                        help='InSpec, Checkov or Cloud Custodian JSON report, or a directory / glob of '
+                             'reports for a fleet rollup')
+    parser.add_argument('output_dir', nargs='?', default='reports', help='Output directory')
+    parser.add_argument('--incremental', action='store_true',
+                        help=f'Write only the delta against the previous run ({INDEX_FILENAME}) '
+                             'instead of the full markdown report')
+    parser.add_argument('--index', action='store_true',
+                        help=f'Full run that also updates {INDEX_FILENAME}, so the next --incremental '
+                             'run compares against it')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Fleet mode: worker processes (default: CPU count, 0 = in-process)')
+    parser.add_argument('--environment', default='production',
+                        help='Environment recorded in / read from the history; in fleet mode, the '
+                             'environment of reports not in a per-environment subdirectory')
+    parser.add_argument('--history', metavar='DB',
+                        help='Also append this scan to a history database (see compliance_history.py)')
+    parser.add_argument('--cache', metavar='DIR', default=os.getenv('REPORT_CACHE_DIR'),
+                        help='Report cache directory shared with the exporter: reports parsed '
+                             'before are read back instead of re-parsed (env REPORT_CACHE_DIR, '
+                             'capped at REPORT_CACHE_MAX_MB)')
+    parser.add_argument('--from-history', metavar='DB',
+                        help='Report on the latest scans recorded in a history database '
+                             'instead of an InSpec JSON file')
+    args = parser.parse_args()
     
-    inspec_json_path = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else 'reports'
+    source = args.inspec_json_file
+    if args.from_history:
+        if args.history:
+            parser.error('--history records a parsed report; it cannot be combined with --from-history')
+        if source and os.path.isfile(source):
+            parser.error('--from-history replaces the InSpec JSON report; give one or the other')
+        # With no report to parse, a single positional argument is the output directory
+        output_dir = source if source and args.output_dir == parser.get_default('output_dir') else args.output_dir
+        ComplianceReportGenerator(args.from_history).run(
+            output_dir, incremental=args.incremental,
+            from_history=args.from_history, environment=args.environment, index=args.index)
+        return
+    if source is None:
+        parser.error('an InSpec JSON report (or --from-history) is required')
+    if os.path.isdir(source) or (not os.path.exists(source) and glob.has_magic(source)):
+        if args.incremental or args.index or args.history:
+            parser.error('--incremental, --index and --history are not supported for a directory or glob of '
+                         'reports (record fleets with compliance_history.py record)')
+        run_fleet(source, args.output_dir, args.workers, args.environment)
+        return
     
-    generator = ComplianceReportGenerator(inspec_json_path)
-    generator.run(output_dir)
+    generator = ComplianceReportGenerator(source)
+    generator.run(args.output_dir, incremental=args.incremental, history=args.history,
+                  environment=args.environment, cache=args.cache, index=args.index)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,8 @@
+"""Make the compliance library, the dashboard scripts and the benchmark helpers importable"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in ('scripts', os.path.join('dashboard', 'scripts'), 'benchmarks'):
+    sys.path.insert(0, os.path.join(ROOT, path))
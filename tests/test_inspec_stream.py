@@ -0,0 +1,94 @@
+"""The streaming reader must see the same controls as json.load, whatever the chunk boundaries"""
+
+import json
+
+import pytest
+
+from compliance_lib import InSpecStreamReader
+from compliance_lib.inspec_stream import CONTROL_FIELDS, FAILURE_FIELDS
+from synthetic_report import write_report
+
+CHUNK_SIZES = [1, 2, 3, 7, 64, 1 << 16]
+
+REPORT = {
+    'platform': {'name': 'aws', 'release': 'aws-api', 'tags': ['a', {'b': None}]},
+    'profiles': [
+        {
+            'name': 'cis-aws',
+            'version': '1.2.0',
+            'depends': [{'name': 'x'}],
+            'controls': [
+                {
+                    'id': 'cis-aws-1.1',
+                    'title': 'Quotes \" backslashes \\\\ and \\u00e9 unicode é中',
+                    'impact': 7.5e-1,
+                    'tags': {'nested': [[], {}, [1, -2.5E+3, True, False, None]]},
+                    'results': [
+                        {'status': 'passed', 'code_desc': 'ok'},
+                        {'status': 'failed', 'code_desc': 'bad ]}', 'message': 'no, \"really\"\n'},
+                        {'status': 'skipped', 'message': 'n/a'},
+                        'not a result',
+                    ],
+                },
+                {'id': 'cis-aws-1.2', 'impact': 0, 'results': []},
+                {'id': 'cis-aws-1.3', 'title': '', 'impact': 1.0},
+            ],
+            'status': 'loaded',
+        },
+        {'name': 'empty', 'controls': []},
+        {'name': 'no-controls'},
+    ],
+    'statistics': {'duration': 1.5},
+    'version': '5.22.3',
+}
+
+
+def expected_controls(data):
+    """(profile name, control) records built from the whole document"""
+    for profile in data.get('profiles', []):
+        for control in profile.get('controls', []):
+            record = {key: control[key] for key in CONTROL_FIELDS if key in control}
+            results = control.get('results')
+            if isinstance(results, list):
+                statuses = [r.get('status') if isinstance(r, dict) else None for r in results]
+                record['result_count'] = len(results)
+                record['passed_count'] = statuses.count('passed')
+                record['failed_count'] = statuses.count('failed')
+                record['failures'] = [{k: r[k] for k in FAILURE_FIELDS if k in r}
+                                      for r, status in zip(results, statuses) if status == 'failed']
+            yield profile['name'], record
+
+
+def streamed_controls(path, chunk_size):
+    with InSpecStreamReader(path, chunk_size=chunk_size) as reader:
+        controls = [(profile['name'], control) for profile, control in reader.controls()]
+    return controls, reader.metadata
+
+
+@pytest.fixture(params=['handwritten', 'indented', 'synthetic'])
+def report(request, tmp_path):
+    path = tmp_path / 'report.json'
+    if request.param == 'synthetic':
+        write_report(str(path), profiles=2, controls=40, results_per_control=5, failure_rate=0.5)
+    else:
+        path.write_text(json.dumps(REPORT, indent=2 if request.param == 'indented' else None,
+                                   ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_controls_match_json_load(report, chunk_size):
+    with open(report, encoding='utf-8') as f:
+        data = json.load(f)
+    controls, metadata = streamed_controls(report, chunk_size)
+    assert controls == list(expected_controls(data))
+    assert metadata == {key: value for key, value in data.items() if key != 'profiles'}
+
+
+@pytest.mark.parametrize('document', ['{"profiles": [{"controls": [}]}', '{"profiles": []} {}',
+                                      '{"profiles": [{"controls": [{"id": "a" "b"}]}]}'])
+def test_malformed_reports_raise(tmp_path, document):
+    path = tmp_path / 'report.json'
+    path.write_text(document)
+    with pytest.raises(ValueError):
+        streamed_controls(str(path), 2)
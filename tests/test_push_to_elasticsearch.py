@@ -0,0 +1,119 @@
+"""push_to_elasticsearch.py against the stub Elasticsearch of the benchmarks"""
+
+import os
+import sys
+
+import pytest
+
+import push_to_elasticsearch as pusher
+import stub_es
+from synthetic_report import write_report
+
+CONTROLS = 120
+
+
+@pytest.fixture
+def es(monkeypatch):
+    """Start a stub and point the pusher at it; tests may set reject_rate etc. on it"""
+    server = stub_es.start()
+    monkeypatch.setattr(pusher, 'ES_HOST', server.url)
+    yield server
+    server.shutdown()
+
+
+def bulk_requests(server):
+    return sum(path.split('?')[0].endswith('/_bulk') for _, path in server.requests)
+
+
+def push(monkeypatch, tmp_path, *args):
+    monkeypatch.setattr(sys, 'argv', ['push_to_elasticsearch.py', '--state-file',
+                                      str(tmp_path / 'state.json'), '--partition', 'none', *args])
+    pusher.main()
+
+
+def test_bulk_indexer_retries_rejected_items(es):
+    es.reject_rate = 0.3
+    indexer = pusher.BulkIndexer(max_docs=7, max_retries=50, backoff=0.001)
+    for i in range(100):
+        indexer.add({'n': i}, f'doc-{i}')
+    assert indexer.close()
+    assert es.rejected and indexer.retried
+    assert indexer.indexed == 100 and indexer.failed == 0
+    assert sorted(doc['n'] for doc in es.documents.values()) == list(range(100))
+
+
+def test_bulk_indexer_flushes_on_bytes(es):
+    indexer = pusher.BulkIndexer(max_docs=1000, max_bytes=2048)
+    for i in range(50):
+        indexer.add({'padding': 'x' * 100}, f'doc-{i}')
+    assert indexer.close()
+    assert len(es.documents) == 50
+    assert indexer.batches > 1
+
+
+def test_push_is_idempotent(es, monkeypatch, tmp_path):
+    report = str(tmp_path / 'report.json')
+    write_report(report, controls=CONTROLS, results_per_control=2)
+
+    push(monkeypatch, tmp_path, report)
+    documents = dict(es.documents)
+    assert len(documents) == CONTROLS
+    requests_sent = bulk_requests(es)
+
+    # The state file records the report: nothing is sent again
+    push(monkeypatch, tmp_path, report)
+    assert bulk_requests(es) == requests_sent
+
+    # Forced re-push overwrites the same documents instead of adding new ones
+    push(monkeypatch, tmp_path, '--full', report)
+    assert bulk_requests(es) > requests_sent
+    assert es.documents == documents
+
+
+def test_only_changed_controls_are_pushed(es, monkeypatch, tmp_path):
+    report = str(tmp_path / 'report.json')
+    write_report(report, controls=CONTROLS, results_per_control=2, seed=1)
+    push(monkeypatch, tmp_path, report)
+
+    write_report(report, controls=CONTROLS, results_per_control=2, seed=2)
+    es.documents.clear()
+    push(monkeypatch, tmp_path, report)
+    assert 0 < len(es.documents) < CONTROLS
+
+
+@pytest.fixture
+def reports(tmp_path):
+    source = tmp_path / 'reports'
+    source.mkdir()
+    for r in range(6):
+        write_report(str(source / f'scan-{r:02d}.json'), controls=CONTROLS, results_per_control=2, seed=r)
+    return str(source)
+
+
+def backfill(source, checkpoint, concurrency=4):
+    options = {'max_docs': 50, 'backoff': 0.01, 'partition': 'none'}
+    return pusher.backfill(source, options, str(checkpoint), workers=2, concurrency=concurrency,
+                           progress_every=3600)
+
+
+def test_backfill_under_backpressure(es, reports, tmp_path):
+    es.max_concurrent_bulk = 2
+    es.latency = 0.01
+    assert backfill(reports, tmp_path / 'checkpoint.jsonl', concurrency=8)
+    assert len(es.documents) == 6 * CONTROLS
+
+    # Everything is checkpointed: a second run has nothing to push
+    es.documents.clear()
+    assert backfill(reports, tmp_path / 'checkpoint.jsonl')
+    assert not es.documents
+
+
+def test_backfill_resumes_from_checkpoint(es, reports, tmp_path):
+    checkpoint = pusher.BackfillCheckpoint(str(tmp_path / 'checkpoint.jsonl'))
+    for name in sorted(os.listdir(reports))[:4]:
+        path = os.path.join(reports, name)
+        checkpoint.mark_done(path, pusher.file_signature(path))
+    checkpoint.close()
+
+    assert backfill(reports, checkpoint.path)
+    assert len(es.documents) == 2 * CONTROLS
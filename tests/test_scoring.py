@@ -0,0 +1,64 @@
+"""Both scoring engines must classify and count exactly like the per-control ControlRecord rules"""
+
+import random
+
+import pytest
+
+from bench_scoring import random_controls
+from compliance_lib.controls import FAILED, ControlRecord
+from compliance_lib.scoring import NUMPY_MIN_CONTROLS, build_batch, tally
+
+pytest.importorskip('numpy')
+
+ENGINES = ('python', 'numpy')
+SIZES = [1, 2, 10, 100, NUMPY_MIN_CONTROLS - 1, NUMPY_MIN_CONTROLS, NUMPY_MIN_CONTROLS + 1, 5000]
+
+
+def reference_tally(controls):
+    """Counts computed control by control with ControlRecord"""
+    status = [0, 0, 0]
+    severity = [0, 0, 0, 0]
+    sections = {}
+    records = [ControlRecord.from_inspec(control) for control in controls]
+    for record in records:
+        status[record.status] += 1
+        if record.status == FAILED:
+            severity[record.severity] += 1
+        sections.setdefault(record.section, [0, 0, 0])[record.status] += 1
+    return records, status, severity, sections
+
+
+def assert_engines_agree(controls):
+    records, status, severity, sections = reference_tally(controls)
+    results = {}
+    for engine in ENGINES:
+        batch = build_batch('p', controls, engine)
+        counts = tally(batch, engine)
+        assert list(batch.statuses) == [r.status for r in records], engine
+        assert list(batch.severities) == [r.severity for r in records], engine
+        assert counts.status == status, engine
+        assert list(counts.severity.values()) == severity, engine
+        assert counts.sections == sections, engine
+        results[engine] = counts
+    assert results['python'] == results['numpy']
+
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('seed', range(3))
+def test_random_batches(size, seed):
+    assert_engines_agree(random_controls(random.Random(seed * 100003 + size), size))
+
+
+def test_empty_batch():
+    assert_engines_agree([])
+
+
+@pytest.mark.parametrize('size', [1, NUMPY_MIN_CONTROLS + 1])
+def test_all_skipped(size):
+    controls = random_controls(random.Random(size), size)
+    for control in controls:
+        control['result_count'] = control['passed_count'] = control['failed_count'] = 0
+    assert_engines_agree(controls)
+    for engine in ENGINES:
+        counts = tally(build_batch('p', controls, engine), engine)
+        assert counts.status == [0, 0, size]